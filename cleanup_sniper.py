@@ -4,68 +4,251 @@ Cleanup utility for Tribals sniper service
 Use this if the sniper service fails to start due to port conflicts
 """
 
+import os
+import select
+import signal
 import subprocess
 import sys
 import time
 
+SNIPER_PORTS = [9001, 9002, 9003, 9004, 9005]
+
+TCP_LISTEN = b'0A'
+
+
+def _listening_socket_inodes(ports):
+    """Collect inodes of TCP sockets listening on the given ports (Linux only)"""
+    inodes = set()
+    
+    for table in ('/proc/net/tcp', '/proc/net/tcp6'):
+        try:
+            with open(table, 'rb') as f:
+                next(f, None)  # Skip header
+                for line in f:
+                    fields = line.split()
+                    if len(fields) < 10 or fields[3] != TCP_LISTEN:
+                        continue
+                    port_hex = fields[1].rsplit(b':', 1)[1]
+                    if int(port_hex, 16) in ports:
+                        inodes.add(int(fields[9]))
+        except OSError:
+            continue
+    
+    return inodes
+
+
+def _find_pids_by_socket_inodes(inodes):
+    """Map socket inodes to owning PIDs by walking /proc/[pid]/fd"""
+    pids = set()
+    if not inodes:
+        return pids
+    
+    targets = {f"socket:[{inode}]" for inode in inodes}
+    
+    for proc in os.scandir('/proc'):
+        if not proc.name.isdigit():
+            continue
+        try:
+            with os.scandir(f"/proc/{proc.name}/fd") as fds:
+                for fd in fds:
+                    try:
+                        if os.readlink(fd.path) in targets:
+                            pids.add(int(proc.name))
+                            break
+                    except OSError:
+                        continue
+        except OSError:
+            # Process exited or belongs to another user
+            continue
+    
+    return pids
+
+
+def _find_sniper_pids():
+    """Find sniper processes by scanning /proc/[pid]/cmdline (Linux only)"""
+    pids = []
+    own_pid = os.getpid()
+    
+    for proc in os.scandir('/proc'):
+        if not proc.name.isdigit() or int(proc.name) == own_pid:
+            continue
+        try:
+            with open(f"/proc/{proc.name}/cmdline", 'rb') as f:
+                cmdline = f.read()
+        except OSError:
+            continue
+        if b'tribals-sniper' in cmdline:
+            pids.append(int(proc.name))
+    
+    return pids
+
+
+def _kill_pids(pids, sig=signal.SIGKILL):
+    """Send a signal to each PID directly"""
+    for pid in pids:
+        try:
+            os.kill(pid, sig)
+        except ProcessLookupError:
+            pass
+        except PermissionError:
+            print(f"⚠️ Could not kill process {pid}")
+
+
+def _wait_for_exit(pids, timeout):
+    """Wait until the given processes exit, returning the ones still alive"""
+    remaining = set(pids)
+    if not remaining:
+        return remaining
+    
+    if hasattr(os, 'pidfd_open'):
+        # Event-driven wait: a pidfd becomes readable when its process exits
+        poller = select.poll()
+        fds = {}
+        try:
+            for pid in remaining:
+                try:
+                    fd = os.pidfd_open(pid)
+                except ProcessLookupError:
+                    continue
+                except OSError:
+                    # Kernel without pidfd support, use the polling fallback
+                    break
+                fds[fd] = pid
+                poller.register(fd, select.POLLIN)
+            else:
+                remaining = set(fds.values())
+                deadline = time.monotonic() + timeout
+                while fds:
+                    left_ms = (deadline - time.monotonic()) * 1000
+                    if left_ms <= 0:
+                        break
+                    for fd, _ in poller.poll(left_ms):
+                        poller.unregister(fd)
+                        remaining.discard(fds.pop(fd))
+                        os.close(fd)
+                return remaining
+        finally:
+            for fd in fds:
+                os.close(fd)
+    
+    # Fallback: probe with signal 0 on a short interval
+    deadline = time.monotonic() + timeout
+    while remaining and time.monotonic() < deadline:
+        for pid in list(remaining):
+            try:
+                os.kill(pid, 0)
+            except ProcessLookupError:
+                remaining.discard(pid)
+            except PermissionError:
+                pass
+        if remaining:
+            time.sleep(0.05)
+    
+    return remaining
+
+
+def _terminate_pids(pids, grace=0.5):
+    """SIGTERM the given processes, then SIGKILL any still alive after the grace period"""
+    _kill_pids(pids, signal.SIGTERM)
+    
+    survivors = _wait_for_exit(pids, timeout=grace)
+    if survivors:
+        print(f"🔫 Force killing {len(survivors)} process(es) that ignored SIGTERM")
+        _kill_pids(survivors)
+
+
+def _find_port_owner_pids_lsof(ports):
+    """Find processes listening on the given ports with a single lsof call"""
+    try:
+        # PID-only field output for all ports at once
+        result = subprocess.run(
+            ["lsof", "-lnP", "-Fp", "-sTCP:LISTEN",
+             *[f"-iTCP:{port}" for port in ports]],
+            capture_output=True)
+    except FileNotFoundError:
+        print("⚠️ lsof not available")
+        return set()
+    except Exception as e:
+        print(f"⚠️ Error checking ports: {e}")
+        return set()
+    
+    return {int(line[1:]) for line in result.stdout.splitlines()
+            if line.startswith(b'p')}
+
+
 def kill_sniper_processes():
     """Kill any running sniper processes"""
     print("🔍 Looking for running sniper processes...")
     
-    try:
-        # Try to kill by process name
-        result = subprocess.run(["pkill", "-f", "tribals-sniper"], 
-                              capture_output=True, text=True)
-        if result.returncode == 0:
-            print("✅ Killed sniper processes by name")
+    is_linux = sys.platform.startswith('linux')
+    killed = set()
+    
+    if is_linux:
+        # Kill by process name without forking pkill
+        pids = _find_sniper_pids()
+        if pids:
+            killed.update(pids)
+            print("✅ Found sniper processes by name")
         else:
             print("ℹ️ No sniper processes found by name")
-    except FileNotFoundError:
-        print("⚠️ pkill not available")
-    
-    # Try to kill processes on common ports
-    ports = [9001, 9002, 9003, 9004, 9005]
-    
-    for port in ports:
+    else:
         try:
-            # Find processes using the port
-            result = subprocess.run(["lsof", "-ti", f":{port}"], 
+            # Try to kill by process name
+            result = subprocess.run(["pkill", "-f", "tribals-sniper"], 
                                   capture_output=True, text=True)
-            
-            if result.returncode == 0 and result.stdout.strip():
-                pids = result.stdout.strip().split('\n')
-                for pid in pids:
-                    try:
-                        print(f"🔫 Killing process {pid} on port {port}")
-                        subprocess.run(["kill", "-9", pid], check=True)
-                    except subprocess.CalledProcessError:
-                        print(f"⚠️ Could not kill process {pid}")
+            if result.returncode == 0:
+                print("✅ Killed sniper processes by name")
+            else:
+                print("ℹ️ No sniper processes found by name")
         except FileNotFoundError:
-            print("⚠️ lsof not available")
-            break
-        except Exception as e:
-            print(f"⚠️ Error checking port {port}: {e}")
+            print("⚠️ pkill not available")
+    
+    # Try to kill processes on common ports
+    if is_linux:
+        pids = _find_pids_by_socket_inodes(_listening_socket_inodes(set(SNIPER_PORTS)))
+    else:
+        pids = _find_port_owner_pids_lsof(SNIPER_PORTS)
+    
+    for pid in pids - killed:
+        print(f"🔫 Killing process {pid} listening on sniper ports")
+    killed.update(pids)
+    
+    # Graceful shutdown first so the ports are released cleanly
+    _terminate_pids(killed)
+    
+    return killed
 
 def main():
     print("🎯 Tribals Sniper Cleanup Utility")
     print("=" * 40)
     
-    kill_sniper_processes()
+    killed = kill_sniper_processes()
     
-    print("\n⏳ Waiting 2 seconds for processes to terminate...")
-    time.sleep(2)
+    if killed:
+        print("\n⏳ Waiting for processes to terminate...")
+        survivors = _wait_for_exit(killed, timeout=2)
+        if survivors:
+            print(f"⚠️ Processes did not exit in time: {sorted(survivors)}")
     
     # Check if any processes are still running
-    try:
-        result = subprocess.run(["pgrep", "-f", "tribals-sniper"], 
-                              capture_output=True, text=True)
-        if result.returncode == 0:
+    if sys.platform.startswith('linux'):
+        remaining = _find_sniper_pids()
+        if remaining:
             print("⚠️ Some sniper processes may still be running")
-            print(f"PIDs: {result.stdout.strip()}")
+            print(f"PIDs: {' '.join(map(str, remaining))}")
         else:
             print("✅ All sniper processes cleaned up")
-    except FileNotFoundError:
-        print("ℹ️ Cannot verify cleanup (pgrep not available)")
+    else:
+        try:
+            result = subprocess.run(["pgrep", "-f", "tribals-sniper"], 
+                                  capture_output=True, text=True)
+            if result.returncode == 0:
+                print("⚠️ Some sniper processes may still be running")
+                print(f"PIDs: {result.stdout.strip()}")
+            else:
+                print("✅ All sniper processes cleaned up")
+        except FileNotFoundError:
+            print("ℹ️ Cannot verify cleanup (pgrep not available)")
     
     print("\n🚀 You can now restart the bot")
     print("=" * 40)
@@ -3,7 +3,6 @@
 Create all project files for Tribals Bot Python
 """
 import os
-from pathlib import Path
 
 # Create directory structure
 directories = [
@@ -19,7 +18,7 @@ directories = [
 ]
 
 for dir_path in directories:
-    Path(dir_path).mkdir(parents=True, exist_ok=True)
+    os.makedirs(dir_path, exist_ok=True)
 
 # File contents
 files = {
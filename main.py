@@ -6,10 +6,8 @@ import asyncio
 import signal
 import sys
 import os
-import time
 import argparse
 from datetime import datetime
-from pathlib import Path
 
 # Add src to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -20,11 +18,25 @@ from src.core.scheduler import Scheduler
 from src.utils.logger import setup_logger
 from src.utils.discord_webhook import DiscordNotifier
 from src.utils.screenshot_manager import screenshot_manager
+from src.utils.playwright_patches import apply_playwright_patches
 from src.vendor.download_scripts import download_external_scripts
 from src.dashboard.server import DashboardServer
 
+if sys.platform == 'win32':
+    try:
+        import win32api
+        import win32con
+        _HAS_WIN32 = True
+    except ImportError:
+        _HAS_WIN32 = False  # pywin32 not installed
+else:
+    _HAS_WIN32 = False
+
 logger = setup_logger(__name__)
 
+# Set once the runtime directories have been created in this process
+_DIRS_CREATED = False
+
 
 class TribalsBot:
     def __init__(self):
@@ -45,8 +57,13 @@ class TribalsBot:
             # Create directories
             self._create_directories()
             
-            # Download external scripts
-            await download_external_scripts()
+            # Download external scripts while old screenshots (older than 7 days)
+            # are cleaned up on a worker thread
+            loop = asyncio.get_running_loop()
+            await asyncio.gather(
+                download_external_scripts(),
+                loop.run_in_executor(None, screenshot_manager.cleanup_old_screenshots, 7)
+            )
             
             # Verify required files exist
             required_files = [
@@ -54,8 +71,12 @@ class TribalsBot:
                 'vendor/massScavenge.js'
             ]
             
+            # One directory listing instead of a stat per file
+            with os.scandir('vendor') as entries:
+                present = {entry.name for entry in entries}
+            
             for file_path in required_files:
-                if not os.path.exists(file_path):
+                if os.path.basename(file_path) not in present:
                     raise FileNotFoundError(f"Required file missing: {file_path}")
             
             # Initialize browser
@@ -68,9 +89,6 @@ class TribalsBot:
             # Initialize dashboard
             self.dashboard = DashboardServer(self.scheduler, self.config_manager)
             
-            # Clean up old screenshots (older than 7 days)
-            screenshot_manager.cleanup_old_screenshots(7)
-            
             # Log screenshot stats
             stats = screenshot_manager.get_stats()
             if stats['total_files'] > 0:
@@ -85,6 +103,10 @@ class TribalsBot:
         
     def _create_directories(self):
         """Create all necessary directories"""
+        global _DIRS_CREATED
+        if _DIRS_CREATED:
+            return
+            
         dirs = [
             'logs',
             'vendor', 
@@ -99,8 +121,11 @@ class TribalsBot:
         ]
         
         for dir_name in dirs:
-            Path(dir_name).mkdir(parents=True, exist_ok=True)
-            
+            # A single stat is cheaper than mkdir failing with EEXIST
+            if not os.path.isdir(dir_name):
+                os.makedirs(dir_name, exist_ok=True)
+                
+        _DIRS_CREATED = True
         logger.debug("📁 All directories created")
         
     async def start(self):
@@ -212,36 +237,33 @@ async def main():
         
     bot = TribalsBot()
     
-    # Setup signal handlers
-    def signal_handler(signum, frame):
+    # Setup signal handlers on the event loop (dispatched via its wakeup fd)
+    loop = asyncio.get_running_loop()
+    
+    def request_shutdown():
         print("\n🛑 Shutdown signal received, stopping bot...")
         bot._shutdown_event.set()
-        # Force exit after timeout
-        import threading
-        def force_exit():
-            time.sleep(3)
-            print("⚠️ Force stopping...")
-            os._exit(0)
-        threading.Thread(target=force_exit, daemon=True).start()
     
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, request_shutdown)
+        except NotImplementedError:
+            # Proactor loop on Windows: hand the signal over to the loop thread
+            signal.signal(sig, lambda signum, frame: loop.call_soon_threadsafe(request_shutdown))
     
     # Handle Windows signals
-    if sys.platform == 'win32':
-        import win32api
-        import win32con
-        
+    if _HAS_WIN32:
         def win_handler(ctrl_type):
             if ctrl_type in (win32con.CTRL_C_EVENT, win32con.CTRL_BREAK_EVENT):
-                bot.handle_signal(ctrl_type, None)
+                # Runs on the console control thread: hand over to the loop thread
+                loop.call_soon_threadsafe(request_shutdown)
                 return True
             return False
             
         try:
             win32api.SetConsoleCtrlHandler(win_handler, True)
-        except:
-            pass  # win32api not available
+        except Exception as e:
+            logger.warning(f"⚠️ Could not install console control handler: {e}")
     
     try:
         await bot.initialize()
@@ -261,6 +283,16 @@ if __name__ == "__main__":
     # Set event loop policy for Windows
     if sys.platform == 'win32':
         asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+    else:
+        # Prefer uvloop when available; Playwright's pipe transport runs on it unchanged
+        try:
+            import uvloop
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        except ImportError:
+            pass  # uvloop not installed, keep the default loop
+            
+    # Skip source-line reads in Playwright's per-call stack capture
+    apply_playwright_patches()
         
     try:
         asyncio.run(main())
@@ -54,11 +54,17 @@ def install_hcaptcha_challenger_alternative():
     ]
     
     print("📦 Installing hcaptcha-challenger dependencies...")
-    for dep in deps:
-        try:
-            subprocess.check_call([sys.executable, "-m", "pip", "install", dep])
-        except:
-            print(f"⚠️  Warning: Could not install {dep}")
+    try:
+        # Single pip run so the resolver only runs once
+        subprocess.check_call([sys.executable, "-m", "pip", "install", "--prefer-binary", *deps])
+    except:
+        # Fall back to one package at a time so a bad package doesn't block the rest
+        print("⚠️  Batch install failed, retrying dependencies one by one...")
+        for dep in deps:
+            try:
+                subprocess.check_call([sys.executable, "-m", "pip", "install", "--prefer-binary", dep])
+            except:
+                print(f"⚠️  Warning: Could not install {dep}")
     
     # Try to install hcaptcha-challenger
     try:
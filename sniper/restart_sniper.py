@@ -1,48 +1,146 @@
 #!/usr/bin/env python3
 
-import subprocess
-import time
+import asyncio
+import signal
 import os
 import sys
 
-def run_command(cmd, description):
-    print(f"\n{'='*60}")
-    print(f"Running: {description}")
-    print(f"Command: {cmd}")
-    print('='*60)
+async def run_command(cmd, description):
+    # Build the whole report first so concurrent commands don't interleave output
+    lines = [
+        f"\n{'='*60}",
+        f"Running: {description}",
+        f"Command: {cmd}",
+        '='*60,
+    ]
     
     try:
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-        print(f"Return code: {result.returncode}")
-        if result.stdout:
-            print(f"STDOUT:\n{result.stdout}")
-        if result.stderr:
-            print(f"STDERR:\n{result.stderr}")
-        return result.returncode == 0
+        proc = await asyncio.create_subprocess_shell(
+            cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+        stdout, stderr = await proc.communicate()
+        lines.append(f"Return code: {proc.returncode}")
+        if stdout:
+            lines.append(f"STDOUT:\n{stdout.decode(errors='replace')}")
+        if stderr:
+            lines.append(f"STDERR:\n{stderr.decode(errors='replace')}")
+        return proc.returncode == 0
     except Exception as e:
-        print(f"ERROR: {e}")
+        lines.append(f"ERROR: {e}")
         return False
+    finally:
+        print('\n'.join(lines))
+
+async def find_sniper_pids():
+    """Find running tribals-sniper processes from /proc, or pgrep where /proc is missing"""
+    if not os.path.isdir('/proc'):
+        proc = await asyncio.create_subprocess_exec(
+            "pgrep", "-f", "tribals-sniper", stdout=asyncio.subprocess.PIPE)
+        stdout, _ = await proc.communicate()
+        return [int(pid) for pid in stdout.split()]
+    
+    pids = []
+    own_pid = os.getpid()
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit() or int(entry) == own_pid:
+            continue
+        try:
+            with open(f'/proc/{entry}/cmdline', 'rb') as f:
+                cmdline = f.read(4096)
+        except OSError:
+            continue
+        if b'tribals-sniper' in cmdline:
+            pids.append(int(entry))
+    return pids
+
+def tail_file(path, lines=20, chunk_size=8192):
+    """Return the last lines of a file by reading only its end"""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(f.tell() - chunk_size, 0))
+        return f.read().decode(errors='replace').splitlines()[-lines:]
+
+async def pkill_sniper_processes():
+    """Fallback for platforms without usable pidfds: pkill and give processes a second"""
+    await run_command("pkill -f tribals-sniper", "Killing existing processes")
+    await asyncio.sleep(1)
+
+async def stop_sniper_processes(timeout=2.0):
+    """SIGTERM running tribals-sniper processes and wait until they have exited"""
+    if not hasattr(os, 'pidfd_open'):
+        await pkill_sniper_processes()
+        return
+    
+    pids = await find_sniper_pids()
+    if not pids:
+        print("No tribals-sniper processes running")
+        return
+    
+    loop = asyncio.get_running_loop()
+    exits = {}
+    
+    def on_exit(fd):
+        loop.remove_reader(fd)
+        exits[fd].set_result(None)
+    
+    fallback = False
+    try:
+        for pid in pids:
+            try:
+                fd = os.pidfd_open(pid)
+            except ProcessLookupError:
+                continue
+            except OSError as e:
+                # e.g. ENOSYS on kernels older than 5.3
+                print(f"pidfd_open unavailable ({e}), falling back to pkill")
+                fallback = True
+                break
+            try:
+                signal.pidfd_send_signal(fd, signal.SIGTERM)
+            except ProcessLookupError:
+                # Exited between pidfd_open and the signal
+                os.close(fd)
+                continue
+            except OSError as e:
+                os.close(fd)
+                print(f"Could not signal {pid} ({e}), falling back to pkill")
+                fallback = True
+                break
+            print(f"Sent SIGTERM to {pid}")
+            # The pidfd becomes readable once the process has exited
+            exits[fd] = loop.create_future()
+            loop.add_reader(fd, on_exit, fd)
+        
+        if exits and not fallback:
+            done, pending = await asyncio.wait(exits.values(), timeout=timeout)
+            if pending:
+                print(f"{len(pending)} process(es) still running after {timeout}s")
+    finally:
+        for fd in exits:
+            loop.remove_reader(fd)
+            os.close(fd)
+    
+    if fallback:
+        await pkill_sniper_processes()
 
-def main():
+async def main():
     # Change to sniper directory
     os.chdir('/Users/maringlen.kovaci/tribals/tribals-bot-python/sniper')
     print(f"Working directory: {os.getcwd()}")
     
-    # 1. Build the project
+    # 1-2. Build the project while stopping existing processes; neither depends on the other
     print("\n1. Building the sniper service...")
-    if not run_command("cargo build --release", "Building Rust project"):
-        print("Build failed! Continuing anyway...")
-    
-    # 2. Kill any existing processes
     print("\n2. Killing existing tribals-sniper processes...")
-    run_command("pkill -f tribals-sniper", "Killing existing processes")
-    time.sleep(1)
+    build_task = asyncio.create_task(run_command("cargo build --release", "Building Rust project"))
+    kill_task = asyncio.create_task(stop_sniper_processes())
+    built, _ = await asyncio.gather(build_task, kill_task)
+    if not built:
+        print("Build failed! Continuing anyway...")
     
     # 3. Start the service
     print("\n3. Starting the tribals-sniper service...")
     log_file = "/tmp/sniper_output.log"
     cmd = f"RUST_LOG=info ./target/release/tribals-sniper > {log_file} 2>&1 &"
-    if run_command(cmd, "Starting service"):
+    if await run_command(cmd, "Starting service"):
         print(f"Service started! Logs are being written to {log_file}")
     else:
         print("Failed to start service!")
@@ -50,22 +148,29 @@ def main():
     
     # 4. Wait for service to initialize
     print("\n4. Waiting for service to start...")
-    time.sleep(3)
+    await asyncio.sleep(3)
     
     # 5. Test the service
     print("\n5. Testing the service...")
-    if run_command("curl -s http://127.0.0.1:9001/api/attacks", "Testing /api/attacks endpoint"):
+    if await run_command("curl -s http://127.0.0.1:9001/api/attacks", "Testing /api/attacks endpoint"):
         print("Service is responding!")
     else:
         print("Service is not responding!")
     
     # 6. Check if process is running
     print("\n6. Checking if process is running...")
-    run_command("ps aux | grep tribals-sniper | grep -v grep", "Checking process")
+    pids = await find_sniper_pids()
+    if pids:
+        print(f"tribals-sniper running with PID(s): {' '.join(map(str, pids))}")
+    else:
+        print("tribals-sniper is not running!")
     
     # 7. Show recent logs
     print(f"\n7. Recent logs from {log_file}:")
-    run_command(f"tail -20 {log_file}", "Showing recent logs")
+    try:
+        print('\n'.join(tail_file(log_file)))
+    except OSError as e:
+        print(f"ERROR: {e}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    asyncio.run(main())
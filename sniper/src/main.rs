@@ -52,6 +52,13 @@ pub struct ScheduleResponse {
     pub status: String,
 }
 
+#[derive(Serialize, Deserialize)]
+pub struct BatchScheduleResult {
+    pub attack_id: Option<Uuid>,
+    pub scheduled_for: Option<DateTime<Local>>,
+    pub status: String, // "scheduled" or "rejected"
+}
+
 #[derive(Serialize, Deserialize)]
 pub struct StatusResponse {
     pub service_status: String,
@@ -119,6 +126,7 @@ async fn main() -> anyhow::Result<()> {
         .route("/status", get(get_status))
         .route("/session", post(update_session))
         .route("/attack/schedule", post(schedule_attack))
+        .route("/attack/schedule_batch", post(schedule_attacks_batch))
         .route("/attack/:id", get(get_attack_status))
         .route("/attack/:id", delete(cancel_attack))
         .route("/attacks", get(list_attacks))
@@ -223,23 +231,7 @@ async fn schedule_attack(
     info!("📊 Queue state before scheduling: {} attacks", pre_queue_size);
     
     // Create scheduled attack
-    let attack = ScheduledAttack {
-        id: Uuid::new_v4(),
-        target_village_id: request.target_village_id,
-        source_village_id: request.source_village_id,
-        attack_type: request.attack_type,
-        units: request.units,
-        execute_at: request.execute_at,
-        priority: request.priority.unwrap_or(100),
-        created_at: Local::now(),
-        status: "scheduled".to_string(),
-        executed_at: None,
-        success: None,
-        error: None,
-        payload: None,
-        response: None,
-        response_time_ms: None,
-    };
+    let attack = new_scheduled_attack(request);
     
     let attack_id = attack.id;
     let execute_at = attack.execute_at;
@@ -274,6 +266,66 @@ async fn schedule_attack(
     }))
 }
 
+async fn schedule_attacks_batch(
+    State(state): State<AppState>,
+    Json(requests): Json<Vec<ScheduleRequest>>,
+) -> Json<Vec<BatchScheduleResult>> {
+    info!("📥 Received batch schedule request with {} attacks", requests.len());
+    
+    let mut results = Vec::with_capacity(requests.len());
+    let mut scheduled = 0;
+    
+    for request in requests {
+        // Same validation as single scheduling, but rejected per item
+        if request.execute_at <= Local::now() || request.units.is_empty() {
+            warn!("❌ Rejected batch attack {} -> {} (execute time in the past or no units)",
+                  request.source_village_id, request.target_village_id);
+            results.push(BatchScheduleResult {
+                attack_id: None,
+                scheduled_for: None,
+                status: "rejected".to_string(),
+            });
+            continue;
+        }
+        
+        let attack = new_scheduled_attack(request);
+        let attack_id = attack.id;
+        let execute_at = attack.execute_at;
+        
+        state.sniper.schedule_attack(attack).await;
+        scheduled += 1;
+        
+        results.push(BatchScheduleResult {
+            attack_id: Some(attack_id),
+            scheduled_for: Some(execute_at),
+            status: "scheduled".to_string(),
+        });
+    }
+    
+    info!("✅ Batch scheduled {} of {} attacks", scheduled, results.len());
+    Json(results)
+}
+
+fn new_scheduled_attack(request: ScheduleRequest) -> ScheduledAttack {
+    ScheduledAttack {
+        id: Uuid::new_v4(),
+        target_village_id: request.target_village_id,
+        source_village_id: request.source_village_id,
+        attack_type: request.attack_type,
+        units: request.units,
+        execute_at: request.execute_at,
+        priority: request.priority.unwrap_or(100),
+        created_at: Local::now(),
+        status: "scheduled".to_string(),
+        executed_at: None,
+        success: None,
+        error: None,
+        payload: None,
+        response: None,
+        response_time_ms: None,
+    }
+}
+
 async fn get_attack_status(
     State(state): State<AppState>,
     Path(id): Path<Uuid>,
@@ -2,15 +2,90 @@
 Auto Buyer - FAST VERSION - No human-like delays for maximum speed
 """
 import asyncio
-import random
 from datetime import datetime
 from typing import Optional, Dict, List
 
+from playwright.async_api import Error as PlaywrightError
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
 from ..core.base_automation import BaseAutomation
 from ..utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Reads stock and rate of every resource in one page round-trip
+READ_RESOURCES_JS = """
+(resources) => {
+    const out = {};
+    for (const r of resources) {
+        const stock = document.querySelector('#premium_exchange_stock_' + r);
+        const rate = document.querySelector('#premium_exchange_rate_' + r);
+        const stockMatch = (stock?.textContent || '').match(/\\d+/);
+        const rateMatch = (rate?.textContent || '').match(/(\\d+):(\\d+)/);
+        out[r] = {
+            stock: stockMatch ? parseInt(stockMatch[0]) : 0,
+            rate: rateMatch ? parseInt(rateMatch[1]) : null
+        };
+    }
+    return out;
+}
+"""
+
+# Polls for an element inside the page and returns the first integer in its text
+EVAL_NUMBER_JS = """
+async ({ sel, t }) => {
+    const start = Date.now();
+    while (Date.now() - start < t) {
+        const el = document.querySelector(sel);
+        if (el) {
+            const m = (el.textContent || '').match(/\\d+/);
+            if (m) return parseInt(m[0]);
+        }
+        await new Promise(r => setTimeout(r, 50));
+    }
+    return null;
+}
+"""
+
+_CONFIRM_SELECTOR = '.evt-confirm-btn.btn-confirm-yes'
+_CANCEL_SELECTOR = '.evt-cancel-btn.btn-confirm-no'
+_OFFERED_SELECTOR = '#premium_exchange table.vis tr.row_a td:nth-child(2)'
+
+# Truthy once the purchase confirmation dialog has been rendered
+DIALOG_READY_JS = f"""
+() => document.querySelector('#premium_exchange td.warn')
+    || document.querySelector('{_OFFERED_SELECTOR}')
+"""
+
+# Reads the trade warning flag and the offered amount from the confirmation dialog
+READ_DIALOG_JS = f"""
+() => {{
+    const offered = document.querySelector('{_OFFERED_SELECTOR}');
+    const m = (offered?.textContent || '').match(/\\d+/);
+    return {{
+        warn: !!document.querySelector('#premium_exchange td.warn'),
+        offered: m ? parseInt(m[0]) : null
+    }};
+}}
+"""
+
+# Clears all buy inputs, fills one resource and clicks calculate, firing the
+# input/change events the game listens for
+PREPARE_PURCHASE_JS = """
+({ res, amt }) => {
+    document.querySelectorAll('input.premium-exchange-input[data-type="buy"]')
+        .forEach(input => input.value = '');
+    const el = document.querySelector(
+        `input.premium-exchange-input[data-resource="${res}"][data-type="buy"]`);
+    el.value = String(amt);
+    el.dispatchEvent(new Event('input', { bubbles: true }));
+    el.dispatchEvent(new Event('change', { bubbles: true }));
+    document.querySelector('input.btn-premium-exchange-buy').click();
+}
+"""
+
+CLICK_JS = "(sel) => { const b = document.querySelector(sel); if (b) b.click(); return !!b; }"
+
 
 class AutoBuyer(BaseAutomation):
     """Automates premium resource purchasing at maximum speed"""
@@ -33,10 +108,10 @@ class AutoBuyer(BaseAutomation):
         """Main automation loop - FAST MODE"""
         while self.running and self.is_within_active_hours():
             try:
-                # Check if paused
-                if hasattr(self, 'paused') and self.paused:
+                # Wait while paused
+                if not self._pause_event.is_set():
                     logger.debug(f"{self.name} is paused, waiting...")
-                    await asyncio.sleep(1)
+                    await self._pause_event.wait()
                     continue
                     
                 # Check premium points
@@ -58,42 +133,41 @@ class AutoBuyer(BaseAutomation):
                 else:
                     # Quick check interval
                     await asyncio.sleep(1)  # 1 second if nothing to buy
+                self._reset_backoff()
                     
+            except PlaywrightTimeoutError as e:
+                # Element briefly missing - retry right away, backing off if it persists
+                await self.retry_after_timeout(e, "buy loop")
+            except (ConnectionError, PlaywrightError) as e:
+                await self._backoff_after_error(e, "buy loop")
             except Exception as e:
                 logger.error(f"❌ Error in buy loop: {e}", exc_info=True)
                 await asyncio.sleep(5)  # Short error recovery
+                self._reset_backoff()
                 
     async def get_premium_points(self) -> int:
         """Get current premium points - FAST"""
         return await self.get_number_from_element_fast('#premium_points')
         
-    async def get_stock(self, resource: str) -> int:
-        """Get stock for a resource - FAST"""
-        return await self.get_number_from_element_fast(f'#premium_exchange_stock_{resource}')
-        
-    async def get_rate(self, resource: str) -> int:
-        """Get exchange rate for a resource - FAST"""
-        selector = f'#premium_exchange_rate_{resource}'
-        text = await self.wait_and_get_text_fast(selector)
-        if text:
-            import re
-            match = re.search(r'(\d+):(\d+)', text)
-            if match:
-                return int(match.group(1))
-        return float('inf')
+    async def read_all_resources(self) -> Dict[str, Dict]:
+        """Read stock and rate for all resources in a single evaluate"""
+        return await self.page.evaluate(READ_RESOURCES_JS, self.resources)
         
     async def check_and_buy_resources_fast(self) -> bool:
         """Check all resources and buy the best option - FAST"""
         options = []
         
-        # Check all resources in parallel for speed
-        tasks = []
-        for resource in self.resources:
-            tasks.append(self.check_resource_fast(resource))
-            
-        results = await asyncio.gather(*tasks)
+        # One round-trip for every resource's stock and rate
+        market = await self.read_all_resources()
         
-        for result in results:
+        for resource in self.resources:
+            data = market.get(resource) or {}
+            rate = data.get('rate')
+            result = self.check_resource_fast(
+                resource,
+                data.get('stock', 0),
+                rate if rate is not None else float('inf')
+            )
             if result:
                 options.append(result)
                 
@@ -101,9 +175,8 @@ class AutoBuyer(BaseAutomation):
             logger.debug("ℹ️ No resources available for purchase")
             return False
             
-        # Sort by amount (highest first)
-        options.sort(key=lambda x: x['amount'], reverse=True)
-        best = options[0]
+        # Pick the largest amount
+        best = max(options, key=lambda x: x['amount'])
         
         self.attempts += 1
         logger.info(f"🔄 #{self.attempts} Buying {best['amount']} {best['resource']} @ {best['rate']}")
@@ -111,15 +184,12 @@ class AutoBuyer(BaseAutomation):
         # Execute purchase FAST
         return await self.execute_purchase_fast(best['resource'], best['amount'])
         
-    async def check_resource_fast(self, resource: str) -> Optional[Dict]:
-        """Check a single resource - FAST"""
+    def check_resource_fast(self, resource: str, stock: int, rate: float) -> Optional[Dict]:
+        """Check a single resource from already-read market data - FAST"""
         try:
-            stock = await self.get_stock(resource)
             if stock < self.script_config['min_stock']:
                 return None
                 
-            rate = await self.get_rate(resource)
-            
             # Calculate amount to buy
             if stock >= rate:
                 amount = (stock // rate) * rate
@@ -133,53 +203,44 @@ class AutoBuyer(BaseAutomation):
                     'amount': amount,
                     'rate': rate
                 }
-        except:
+        except (TypeError, ValueError, ZeroDivisionError) as e:
+            logger.debug(f"Could not evaluate {resource}: {e}")
             return None
             
     async def execute_purchase_fast(self, resource: str, amount: int) -> bool:
         """Execute a purchase - FAST MODE"""
         try:
-            # Clear all inputs first
-            await self.page.evaluate("""
-                document.querySelectorAll('input.premium-exchange-input[data-type="buy"]')
-                    .forEach(input => input.value = '');
-            """)
-            
-            # Fill amount directly
-            input_selector = f'input.premium-exchange-input[data-resource="{resource}"][data-type="buy"]'
-            await self.page.fill(input_selector, str(amount))
-            
-            # Click calculate button immediately
-            await self.page.click('input.btn-premium-exchange-buy')
+            # Clear inputs, fill the amount and click calculate in one round-trip
+            await self.page.evaluate(PREPARE_PURCHASE_JS, {"res": resource, "amt": amount})
             
-            # Quick wait for dialog
-            await asyncio.sleep(0.2)
+            # Wait until the confirmation dialog (or its warning) is rendered
+            try:
+                await self.page.wait_for_function(DIALOG_READY_JS, polling=50, timeout=2000)
+            except PlaywrightTimeoutError:
+                logger.warning("⚠️ Confirmation dialog did not appear")
+                return False
             
-            # Check for warnings
-            warning = await self.page.query_selector('#premium_exchange td.warn')
-            if warning:
+            # Read warning and offered amount together
+            dialog = await self.page.evaluate(READ_DIALOG_JS)
+            if dialog['warn']:
                 logger.warning("⚠️ Trade warning detected")
-                await self.page.click('.evt-cancel-btn.btn-confirm-no')
+                if not await self.page.evaluate(CLICK_JS, _CANCEL_SELECTOR):
+                    logger.warning("⚠️ Cancel button not found")
                 return False
                 
-            # Get offered amount
-            offered_text = await self.wait_and_get_text_fast(
-                '#premium_exchange table.vis tr.row_a td:nth-child(2)'
-            )
+            offered = dialog['offered']
             
-            if offered_text:
-                import re
-                match = re.search(r'(\d+)', offered_text)
-                if match:
-                    offered = int(match.group(1))
-                    
-                    if offered >= amount:
-                        logger.info(f"✅ Good trade: {offered} offered")
-                        await self.page.click('.evt-confirm-btn.btn-confirm-yes')
-                        return True
-                    else:
-                        logger.warning(f"❌ Bad trade: only {offered} offered")
-                        await self.page.click('.evt-cancel-btn.btn-confirm-no')
+            if offered is not None:
+                if offered >= amount:
+                    logger.info(f"✅ Good trade: {offered} offered")
+                    if not await self.page.evaluate(CLICK_JS, _CONFIRM_SELECTOR):
+                        logger.warning("⚠️ Confirm button not found, purchase not made")
+                        return False
+                    return True
+                else:
+                    logger.warning(f"❌ Bad trade: only {offered} offered")
+                    if not await self.page.evaluate(CLICK_JS, _CANCEL_SELECTOR):
+                        logger.warning("⚠️ Cancel button not found")
                         
         except Exception as e:
             logger.error(f"❌ Purchase failed: {e}", exc_info=True)
@@ -187,10 +248,6 @@ class AutoBuyer(BaseAutomation):
         return False
         
     # Override parent methods to remove human delays
-    async def human_delay(self, min_ms: int, max_ms: int):
-        """No human delay in fast mode"""
-        pass
-        
     async def click_with_delay(self, selector: str, min_delay: int = 0, max_delay: int = 0) -> bool:
         """Click without delay"""
         try:
@@ -199,32 +256,11 @@ class AutoBuyer(BaseAutomation):
         except:
             return False
             
-    async def wait_and_get_text_fast(self, selector: str, timeout: int = 3000) -> Optional[str]:
-        """Get text without reading simulation"""
-        try:
-            element = await self.page.wait_for_selector(selector, timeout=timeout)
-            if element:
-                return await element.text_content()
-        except:
-            pass
-        return None
+    async def _eval_number(self, selector: str, timeout_ms: int = 3000) -> Optional[int]:
+        """Wait for an element and parse its number in a single evaluate"""
+        return await self.page.evaluate(EVAL_NUMBER_JS, {"sel": selector, "t": timeout_ms})
         
     async def get_number_from_element_fast(self, selector: str, default: int = 0) -> int:
         """Extract number fast"""
-        text = await self.wait_and_get_text_fast(selector)
-        if text:
-            import re
-            match = re.search(r'\d+', text)
-            if match:
-                return int(match.group())
-        return default
-        
-    async def simulate_page_scan(self):
-        """No page scanning in fast mode"""
-        pass
-        
-    async def perform_random_actions(self):
-        """No random actions in fast mode"""
-        pass
-
-
+        number = await self._eval_number(selector)
+        return default if number is None else number
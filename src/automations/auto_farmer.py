@@ -2,15 +2,172 @@
 Auto Farmer - Fixed to handle FarmGod popup dialog
 """
 import asyncio
+import functools
 import os
 from datetime import datetime
-from typing import List, Optional
+from typing import Optional
+
+from playwright.async_api import Error as PlaywrightError
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 
 from ..core.base_automation import BaseAutomation
 from ..utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Playwright error messages that mean the page or connection went away, not a script failure
+TRANSIENT_ERROR_MARKERS = ('Target closed', 'has been closed', 'net::ERR_')
+
+
+def _is_transient(error: Exception) -> bool:
+    """Whether an error is worth an immediate retry rather than the failure wait"""
+    if isinstance(error, (ConnectionError, PlaywrightTimeoutError)):
+        return True
+    return isinstance(error, PlaywrightError) and any(
+        marker in str(error) for marker in TRANSIENT_ERROR_MARKERS)
+
+
+# Returns the first selector that matches an element on the page, or null
+FIRST_MATCH_JS = """
+(selectors) => {
+    for (const s of selectors) {
+        if (document.querySelector(s)) return s;
+    }
+    return null;
+}
+"""
+
+# Button-search, popup-close and last-resort helpers, installed once per page
+# so each cycle only sends a short call instead of the full source
+FARMGOD_HELPERS_JS = """
+    tb.farm = {
+        findPlanFarmsButton: () => {
+            // Look for button in popup_box_FarmGod
+            const popup = document.querySelector('#popup_box_FarmGod');
+            if (!popup) {
+                // Try massScavengeSophie as fallback
+                const sophie = document.querySelector('#massScavengeSophie');
+                if (!sophie) return { success: false, error: 'No dialog found' };
+            }
+
+            // Find the exact button: class="btn optionButton" value="Plan farms"
+            const button = document.querySelector('input.btn.optionButton[value="Plan farms"]');
+            if (button) {
+                button.click();
+                return { 
+                    success: true, 
+                    selector: 'input.btn.optionButton[value="Plan farms"]',
+                    value: button.value
+                };
+            }
+
+            // Try without exact value match (for different languages)
+            const optionButton = document.querySelector('input.btn.optionButton');
+            if (optionButton) {
+                optionButton.click();
+                return { 
+                    success: true, 
+                    selector: 'input.btn.optionButton',
+                    value: optionButton.value
+                };
+            }
+
+            // Try any button with optionButton class
+            const anyOption = document.querySelector('input.optionButton');
+            if (anyOption) {
+                anyOption.click();
+                return { 
+                    success: true, 
+                    selector: 'input.optionButton',
+                    value: anyOption.value
+                };
+            }
+
+            // Last resort: find any button in the options div
+            const optionsDiv = document.querySelector('.optionsContent');
+            if (optionsDiv) {
+                const anyButton = optionsDiv.querySelector('input[type="button"]');
+                if (anyButton) {
+                    anyButton.click();
+                    return { 
+                        success: true, 
+                        selector: 'last resort button',
+                        value: anyButton.value
+                    };
+                }
+            }
+
+            // Debug info
+            const allButtons = document.querySelectorAll('input[type="button"]');
+            return { 
+                success: false, 
+                error: 'No button found',
+                totalButtons: allButtons.length,
+                buttons: Array.from(allButtons).map(b => ({
+                    value: b.value,
+                    className: b.className,
+                    id: b.id
+                }))
+            };
+        },
+
+        closeFarmGodPopup: () => {
+            // Close popup_box_FarmGod
+            const popup = document.querySelector('#popup_box_FarmGod');
+            if (popup) {
+                const closeBtn = popup.querySelector('.popup_box_close');
+                if (closeBtn) {
+                    closeBtn.click();
+                } else {
+                    popup.remove();
+                }
+            }
+
+            // Also remove massScavengeSophie if present
+            const sophie = document.querySelector('#massScavengeSophie');
+            if (sophie) sophie.remove();
+        },
+
+        finalAttempt: () => {
+            // Find ANY button with optionButton class
+            const optionButtons = document.querySelectorAll('input.optionButton');
+            if (optionButtons.length > 0) {
+                // Click the last one (usually the action button)
+                const button = optionButtons[optionButtons.length - 1];
+                button.click();
+                return { 
+                    success: true, 
+                    value: button.value,
+                    index: optionButtons.length - 1
+                };
+            }
+
+            // Try clicking readyToSend function directly
+            if (typeof readyToSend === 'function') {
+                readyToSend();
+                return { success: true, method: 'direct function call' };
+            }
+
+            return { success: false };
+        }
+    };
+"""
+
+
+@functools.lru_cache(maxsize=4)
+def _read_farmgod(path: str, mtime: float) -> Optional[str]:
+    """Read and decode farmgod.js; cached per path and modification time"""
+    # Try different encodings
+    for encoding in ['utf-8', 'utf-8-sig', 'latin-1', 'cp1252']:
+        try:
+            with open(path, 'r', encoding=encoding) as f:
+                content = f.read()
+            logger.debug(f"✅ Loaded farmgod.js with {encoding} encoding")
+            return content
+        except UnicodeDecodeError:
+            continue
+    return None
+
 
 class AutoFarmer(BaseAutomation):
     """Automates farming using farmgod.js"""
@@ -27,10 +184,10 @@ class AutoFarmer(BaseAutomation):
         """Main automation loop"""
         while self.running and self.is_within_active_hours():
             try:
-                # Check if paused
-                if hasattr(self, 'paused') and self.paused:
+                # Wait while paused
+                if not self._pause_event.is_set():
                     logger.debug(f"{self.name} is paused, waiting...")
-                    await asyncio.sleep(1)
+                    await self._pause_event.wait()
                     continue
                     
                 # Run farming cycle
@@ -49,11 +206,18 @@ class AutoFarmer(BaseAutomation):
                 # Wait for next cycle
                 interval = self.script_config['interval_seconds']
                 logger.info(f"⏳ Waiting {interval}s until next farming cycle")
+                self._reset_backoff()
                 await asyncio.sleep(interval)
                 
+            except PlaywrightTimeoutError as e:
+                # Recoverable - retry right away, backing off if it persists
+                await self.retry_after_timeout(e, "farming cycle")
+            except (ConnectionError, PlaywrightError) as e:
+                await self._backoff_after_error(e, "farming cycle")
             except Exception as e:
                 logger.error(f"❌ Error in farming cycle: {e}", exc_info=True)
                 await asyncio.sleep(30)
+                self._reset_backoff()
                 
     async def run_farming_cycle(self) -> bool:
         """Execute one farming cycle"""
@@ -63,6 +227,8 @@ class AutoFarmer(BaseAutomation):
             # Load farmgod.js
             if not await self.load_farmgod_script():
                 return False
+                
+            await self.install_helpers(FARMGOD_HELPERS_JS)
             
             # Wait longer for script to initialize and UI to appear
             await asyncio.sleep(3)
@@ -78,18 +244,13 @@ class AutoFarmer(BaseAutomation):
                 '.ui-widget-content#massScavengeSophie'
             ]
             
-            farmgod_dialog = None
-            for selector in dialog_selectors:
-                farmgod_dialog = await self.page.query_selector(selector)
-                if farmgod_dialog:
-                    logger.info(f"✅ Found FarmGod dialog with selector: {selector}")
-                    break
-                    
-            if not farmgod_dialog:
-                # Wait a bit more for popup to appear
-                await asyncio.sleep(2)
-                # Try again with the most common selector
-                farmgod_dialog = await self.page.query_selector('#popup_box_FarmGod')
+            # Let Playwright wait in the browser for any of the dialogs to attach
+            try:
+                await self.page.locator(', '.join(dialog_selectors)).first.wait_for(
+                    state='attached', timeout=5000)
+                farmgod_dialog = True
+            except PlaywrightTimeoutError:
+                farmgod_dialog = None
                 
             if not farmgod_dialog:
                 logger.warning("⚠️ FarmGod dialog did not appear")
@@ -136,77 +297,7 @@ class AutoFarmer(BaseAutomation):
             button_clicked = False
             
             # Method 1: Direct JavaScript click on the exact button
-            js_click_result = await self.page.evaluate("""
-                () => {
-                    // Look for button in popup_box_FarmGod
-                    const popup = document.querySelector('#popup_box_FarmGod');
-                    if (!popup) {
-                        // Try massScavengeSophie as fallback
-                        const sophie = document.querySelector('#massScavengeSophie');
-                        if (!sophie) return { success: false, error: 'No dialog found' };
-                    }
-                    
-                    // Find the exact button: class="btn optionButton" value="Plan farms"
-                    const button = document.querySelector('input.btn.optionButton[value="Plan farms"]');
-                    if (button) {
-                        button.click();
-                        return { 
-                            success: true, 
-                            selector: 'input.btn.optionButton[value="Plan farms"]',
-                            value: button.value
-                        };
-                    }
-                    
-                    // Try without exact value match (for different languages)
-                    const optionButton = document.querySelector('input.btn.optionButton');
-                    if (optionButton) {
-                        optionButton.click();
-                        return { 
-                            success: true, 
-                            selector: 'input.btn.optionButton',
-                            value: optionButton.value
-                        };
-                    }
-                    
-                    // Try any button with optionButton class
-                    const anyOption = document.querySelector('input.optionButton');
-                    if (anyOption) {
-                        anyOption.click();
-                        return { 
-                            success: true, 
-                            selector: 'input.optionButton',
-                            value: anyOption.value
-                        };
-                    }
-                    
-                    // Last resort: find any button in the options div
-                    const optionsDiv = document.querySelector('.optionsContent');
-                    if (optionsDiv) {
-                        const anyButton = optionsDiv.querySelector('input[type="button"]');
-                        if (anyButton) {
-                            anyButton.click();
-                            return { 
-                                success: true, 
-                                selector: 'last resort button',
-                                value: anyButton.value
-                            };
-                        }
-                    }
-                    
-                    // Debug info
-                    const allButtons = document.querySelectorAll('input[type="button"]');
-                    return { 
-                        success: false, 
-                        error: 'No button found',
-                        totalButtons: allButtons.length,
-                        buttons: Array.from(allButtons).map(b => ({
-                            value: b.value,
-                            className: b.className,
-                            id: b.id
-                        }))
-                    };
-                }
-            """)
+            js_click_result = await self.page.evaluate("() => window.__tb.farm.findPlanFarmsButton()")
             
             if js_click_result['success']:
                 button_clicked = True
@@ -223,9 +314,10 @@ class AutoFarmer(BaseAutomation):
                     '.optionsContent input[type="button"]'
                 ]
                 
-                for selector in button_selectors:
+                selector = await self.page.evaluate(FIRST_MATCH_JS, button_selectors)
+                if selector:
                     try:
-                        button = await self.page.wait_for_selector(selector, timeout=2000)
+                        button = await self.page.query_selector(selector)
                         if button:
                             # Get button info before clicking
                             button_info = await button.evaluate("""
@@ -235,42 +327,19 @@ class AutoFarmer(BaseAutomation):
                             await button.click()
                             button_clicked = True
                             logger.info(f"✅ Clicked button via Playwright: {button_info['value']}")
-                            break
                     except Exception as e:
                         logger.debug(f"Selector {selector} failed: {e}")
-                        continue
                         
             if not button_clicked:
                 logger.warning("⚠️ Could not click Plan farms button")
                 
                 # Final attempt: Take a screenshot and try to find any button
-                await self.page.screenshot(path=f"farmgod_dialog_{self.attempts}.png")
+                if self.script_config.get('debug_screenshots'):
+                    await self.page.screenshot(path=f"farmgod_dialog_{self.attempts}.jpg",
+                                               type='jpeg', quality=60, full_page=False)
                 
                 # Try one more time with a broader search
-                final_attempt = await self.page.evaluate("""
-                    () => {
-                        // Find ANY button with optionButton class
-                        const optionButtons = document.querySelectorAll('input.optionButton');
-                        if (optionButtons.length > 0) {
-                            // Click the last one (usually the action button)
-                            const button = optionButtons[optionButtons.length - 1];
-                            button.click();
-                            return { 
-                                success: true, 
-                                value: button.value,
-                                index: optionButtons.length - 1
-                            };
-                        }
-                        
-                        // Try clicking readyToSend function directly
-                        if (typeof readyToSend === 'function') {
-                            readyToSend();
-                            return { success: true, method: 'direct function call' };
-                        }
-                        
-                        return { success: false };
-                    }
-                """)
+                final_attempt = await self.page.evaluate("() => window.__tb.farm.finalAttempt()")
                 
                 if final_attempt['success']:
                     button_clicked = True
@@ -282,42 +351,33 @@ class AutoFarmer(BaseAutomation):
             await asyncio.sleep(5)
             
             # Close the popup dialog if it's still open
-            await self.page.evaluate("""
-                () => {
-                    // Close popup_box_FarmGod
-                    const popup = document.querySelector('#popup_box_FarmGod');
-                    if (popup) {
-                        const closeBtn = popup.querySelector('.popup_box_close');
-                        if (closeBtn) {
-                            closeBtn.click();
-                        } else {
-                            popup.remove();
-                        }
-                    }
-                    
-                    // Also remove massScavengeSophie if present
-                    const sophie = document.querySelector('#massScavengeSophie');
-                    if (sophie) sophie.remove();
-                }
-            """)
+            await self.page.evaluate("() => window.__tb.farm.closeFarmGodPopup()")
             
             # Wait for the results table to appear
             await asyncio.sleep(2)
             
             # Find and click farm icons
-            icons = await self.find_farm_icons()
+            icon_selector = await self.find_farm_icons()
             
-            if not icons:
+            if not icon_selector:
                 logger.warning("⚠️ No farm icons found - villages might be empty")
                 return True  # Not necessarily a failure
                 
-            await self.click_farm_icons(icons)
+            await self.click_farm_icons(icon_selector)
             return True
             
+        except (ConnectionError, PlaywrightError) as e:
+            # Timeouts and lost pages/connections are retried/backed off by run_automation
+            if _is_transient(e):
+                raise
+            logger.error(f"❌ Playwright error in farming cycle: {e}")
+            return False
         except Exception as e:
             logger.error(f"❌ Error in farming cycle: {e}", exc_info=True)
             # Take screenshot for debugging
-            await self.page.screenshot(path=f"farmgod_error_{self.attempts}.png")
+            if self.script_config.get('debug_screenshots'):
+                await self.page.screenshot(path=f"farmgod_error_{self.attempts}.jpg",
+                                           type='jpeg', quality=60, full_page=False)
             return False
         
     async def load_farmgod_script(self) -> bool:
@@ -329,18 +389,8 @@ class AutoFarmer(BaseAutomation):
             return False
             
         try:
-            # Try different encodings
-            encodings = ['utf-8', 'utf-8-sig', 'latin-1', 'cp1252']
-            script_content = None
-            
-            for encoding in encodings:
-                try:
-                    with open(script_path, 'r', encoding=encoding) as f:
-                        script_content = f.read()
-                    logger.debug(f"✅ Loaded farmgod.js with {encoding} encoding")
-                    break
-                except UnicodeDecodeError:
-                    continue
+            # Re-read only when the file has changed
+            script_content = _read_farmgod(script_path, os.path.getmtime(script_path))
                     
             if not script_content:
                 logger.error("❌ Could not read farmgod.js with any encoding")
@@ -365,8 +415,8 @@ class AutoFarmer(BaseAutomation):
             logger.error(f"❌ Failed to load farmgod.js: {e}", exc_info=True)
             return False
         
-    async def find_farm_icons(self, max_attempts: int = 10) -> List:
-        """Find farm icons with retry and multiple selectors"""
+    async def find_farm_icons(self, timeout: int = 5000) -> Optional[str]:
+        """Wait inside the page for farm icons, returning the working selector"""
         selectors = [
             'div.farmGodContent a.farmGod_icon',
             'div.farmGodContent a[class*="farm_icon"]',
@@ -376,56 +426,50 @@ class AutoFarmer(BaseAutomation):
             'td a[class*="farm_icon"]'
         ]
         
-        for attempt in range(max_attempts):
-            for selector in selectors:
-                icons = await self.page.query_selector_all(selector)
-                
-                if icons:
-                    logger.info(f"✅ Found {len(icons)} farm icons with selector: {selector}")
-                    return icons
-                    
-            logger.debug(f"Attempt {attempt + 1}/{max_attempts}: No icons yet")
-            await asyncio.sleep(0.5)
+        try:
+            handle = await self.page.wait_for_function("""
+                (sels) => {
+                    for (const s of sels) {
+                        const n = document.querySelectorAll(s).length;
+                        if (n > 0) return { selector: s, count: n };
+                    }
+                    return false;
+                }
+            """, arg=selectors, polling=100, timeout=timeout)
+        except PlaywrightTimeoutError:
+            logger.debug(f"No farm icons appeared within {timeout}ms")
+            return None
             
-        return []
+        found = await handle.json_value()
+        logger.info(f"✅ Found {found['count']} farm icons with selector: {found['selector']}")
+        return found['selector']
         
-    async def click_farm_icons(self, icons: List):
-        """Click farm icons with rate limiting and error handling"""
+    async def click_farm_icons(self, selector: str):
+        """Click farm icons with rate limiting, running the whole loop inside the page"""
         max_icons = self.script_config.get('max_icons_per_run', 50)
-        icons_to_click = icons
         
         click_interval = max(self.script_config['icon_click_interval'], 250) / 1000
         
-        logger.info(f"🖱️ Clicking {len(icons_to_click)} icons with {click_interval:.2f}s interval")
+        logger.info(f"🖱️ Clicking up to {max_icons} icons with {click_interval:.2f}s interval")
         
-        successful_clicks = 0
-        failed_clicks = 0
-        
-        for i, icon in enumerate(icons_to_click):
-            try:
-                # Use JavaScript click for reliability
-                clicked = await self.page.evaluate("""
-                    (element) => {
-                        if (element) {
-                            element.click();
-                            return true;
-                        }
-                        return false;
+        # Single evaluate: the browser clicks and sleeps between icons itself
+        result = await self.page.evaluate("""
+            async ({ sel, max, interval }) => {
+                const icons = Array.from(document.querySelectorAll(sel)).slice(0, max);
+                let ok = 0, fail = 0;
+                for (let i = 0; i < icons.length; i++) {
+                    try {
+                        icons[i].click();
+                        ok++;
+                    } catch (e) {
+                        fail++;
                     }
-                """, icon)
-                
-                if clicked:
-                    successful_clicks += 1
-                    logger.debug(f"✅ Clicked farm icon #{i+1}")
-                else:
-                    logger.debug(f"⚠️ Icon #{i+1} could not be clicked")
-                    failed_clicks += 1
-                
-                if i < len(icons_to_click) - 1:
-                    await asyncio.sleep(click_interval)
-                    
-            except Exception as e:
-                logger.warning(f"⚠️ Failed to click icon #{i+1}: {e}")
-                failed_clicks += 1
+                    if (i < icons.length - 1) {
+                        await new Promise(r => setTimeout(r, interval));
+                    }
+                }
+                return { ok, fail };
+            }
+        """, {"sel": selector, "max": max_icons, "interval": int(click_interval * 1000)})
                 
-        logger.info(f"✅ Farming cycle complete - {successful_clicks} successful, {failed_clicks} failed")
\ No newline at end of file
+        logger.info(f"✅ Farming cycle complete - {result['ok']} successful, {result['fail']} failed")
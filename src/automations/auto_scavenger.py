@@ -2,16 +2,230 @@
 Auto Scavenger - Fixed to handle massScavenge popup dialog
 """
 import asyncio
+import functools
+import json
 import random
 import os
 from datetime import datetime
+from pathlib import Path
 from typing import Optional
 
+from playwright.async_api import Error as PlaywrightError
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
 from ..core.base_automation import BaseAutomation
+from ..utils.helpers import TB_NAMESPACE_JS
 from ..utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Re-runs the copy of massScavenge.js kept in the page; false if this document
+# doesn't have it yet (first cycle or after a navigation)
+RUN_STORED_SCRIPT_JS = """
+() => {
+    const src = window.__tb && window.__tb.massScavengeSrc;
+    if (typeof src !== 'string') return false;
+    (0, eval)(src);
+    return true;
+}
+"""
+
+# Keeps the script source in the page and runs it in global scope so
+# readyToSend/sendGroup stay reachable from the dialog's onclick handlers
+STORE_AND_RUN_SCRIPT_JS = """
+(src) => {
+    """ + TB_NAMESPACE_JS + """
+    tb.massScavengeSrc = src;
+    (0, eval)(src);
+}
+"""
+
+# Candidate readyToSend() buttons, tried in order
+_READY_SELECTORS = (
+    'input.btnSophie[onclick="readyToSend()"]',
+    'input[onclick="readyToSend()"]',
+    '#sendMass',
+    'input[value*="Calcola"]',  # Italian
+    'input[value*="Calculate"]',  # English
+    '#massScavengeSophie input.btnSophie',
+)
+
+# Candidate sendGroup() buttons, tried in order
+_SEND_SELECTORS = (
+    'input[onclick="sendGroup(0,false)"]',
+    'input[onclick^="sendGroup"][onclick*="false"]',
+    '#sendMass',
+    'input.btnSophie[value*="Lanseaza"]',  # Romanian
+    'input.btnSophie[value*="Launch"]',  # English
+    'input.btnSophie[value*="Lancia"]',  # Italian
+    '#massScavengeFinal input[onclick^="sendGroup"]',
+)
+
+# Button click helpers, installed once per page so each click is a single
+# short call that clicks and reports in one round-trip. The dialog stylesheet
+# and error watcher are only added once the dialog is actually in use
+SCAVENGE_HELPERS_JS = """
+    // Keep both dialogs visible and centered via one stylesheet instead of
+    // restyling them on every cycle
+    const addStyle = () => {
+        if (document.getElementById('tbScavengeStyle')) return;
+        const style = document.createElement('style');
+        style.id = 'tbScavengeStyle';
+        style.textContent = `
+            #massScavengeSophie, #massScavengeFinal {
+                display: block !important;
+                visibility: visible !important;
+                opacity: 1 !important;
+                position: fixed !important;
+                left: 50% !important;
+                top: 50% !important;
+                transform: translate(-50%, -50%) !important;
+                z-index: 9999 !important;
+            }
+            #massScavengeFinal { z-index: 10000 !important; }
+        `;
+        (document.head || document.documentElement).appendChild(style);
+    };
+    
+    // Record error boxes as they are added
+    let errorObserver = null;
+    const watchErrors = () => {
+        if (errorObserver) return;
+        const errorSelector = '.error, .error_box, .warn';
+        const record = (el) => {
+            const text = el.textContent && el.textContent.trim();
+            if (text) tb.scavenge.lastError = text;
+        };
+        errorObserver = new MutationObserver(mutations => {
+            for (const mutation of mutations) {
+                for (const node of mutation.addedNodes) {
+                    if (node.nodeType !== Node.ELEMENT_NODE) {
+                        // Text filled into an existing error box
+                        const box = node.parentElement && node.parentElement.closest(errorSelector);
+                        if (box) record(box);
+                    } else if (node.matches(errorSelector)) {
+                        record(node);
+                    } else {
+                        node.querySelectorAll(errorSelector).forEach(record);
+                    }
+                }
+            }
+        });
+        errorObserver.observe(document.body, { childList: true, subtree: true });
+    };
+    
+    tb.scavenge = {
+        // Latest error/warning text added to the page since the last readyToSend click
+        lastError: null,
+        
+        isScriptLoaded: () => typeof readyToSend !== 'undefined' && typeof sendGroup !== 'undefined',
+        
+        doReadyToSend: (selectors) => {
+            const dialog = document.querySelector('#massScavengeSophie');
+            if (dialog) dialog.focus();
+            addStyle();
+            watchErrors();
+            tb.scavenge.lastError = null;
+            
+            for (const selector of selectors) {
+                const button = document.querySelector(selector);
+                if (button) {
+                    button.click();
+                    return { success: true, selector: selector };
+                }
+            }
+            
+            // Debug info
+            const buttons = document.querySelectorAll('input[type="button"]');
+            return { 
+                success: false, 
+                error: 'No button found',
+                buttonCount: buttons.length,
+                buttons: Array.from(buttons).slice(0, 5).map(b => ({
+                    value: b.value,
+                    onclick: b.getAttribute('onclick'),
+                    className: b.className
+                }))
+            };
+        },
+        
+        doSendGroup: (selectors) => {
+            for (const selector of selectors) {
+                const button = document.querySelector(selector);
+                if (button && !button.disabled) {
+                    button.click();
+                    return { success: true, selector: selector };
+                }
+            }
+            
+            // Debug info
+            const sendButtons = document.querySelectorAll('input[onclick*="sendGroup"]');
+            return { 
+                success: false, 
+                error: 'No send button found',
+                buttonCount: sendButtons.length,
+                buttons: Array.from(sendButtons).map(b => ({
+                    value: b.value,
+                    onclick: b.getAttribute('onclick'),
+                    disabled: b.disabled
+                }))
+            };
+        }
+    };
+"""
+
+# Helper calls sent as raw CDP Runtime.evaluate expressions; constant text with
+# the selector lists baked in
+IS_SCRIPT_LOADED_EXPR = "window.__tb.scavenge.isScriptLoaded()"
+DO_READY_TO_SEND_EXPR = f"window.__tb.scavenge.doReadyToSend({json.dumps(list(_READY_SELECTORS))})"
+DO_SEND_GROUP_EXPR = f"window.__tb.scavenge.doSendGroup({json.dumps(list(_SEND_SELECTORS))})"
+LAST_ERROR_EXPR = "window.__tb.scavenge.lastError"
+
+# Reads the post-send success message and removes both scavenge dialogs
+CONFIRM_AND_CLEANUP_JS = """
+() => {
+    const msg = document.querySelector('.success_msg, .autoHideBox.success');
+    const text = msg ? msg.textContent : null;
+    ['#massScavengeSophie', '#massScavengeFinal'].forEach(selector => {
+        const dialog = document.querySelector(selector);
+        if (dialog) dialog.remove();
+    });
+    return text;
+}
+"""
+
+@functools.lru_cache(maxsize=4)
+def _read_mass_scavenge(path: str, mtime: float) -> Optional[str]:
+    """Read, decode and strip massScavenge.js; cached per path and modification time"""
+    data = Path(path).read_bytes()
+    
+    # UTF-8 with BOM or plain ASCII needs no trial decoding
+    if data[:3] == b'\xef\xbb\xbf':
+        content = data[3:].decode('utf-8')
+    elif data.isascii():
+        content = data.decode('ascii')
+    else:
+        # Try different encodings on the in-memory bytes; latin-1 never fails
+        for encoding in ['utf-8', 'cp1252', 'latin-1']:
+            try:
+                content = data.decode(encoding)
+                logger.debug("✅ Loaded massScavenge.js with %s encoding", encoding)
+                break
+            except UnicodeDecodeError:
+                continue
+        else:
+            return None
+        
+    # Remove javascript: prefix if present
+    if content.strip().startswith('javascript:'):
+        content = content.strip()[11:]
+    return content
+
+
+def _load_mass_scavenge(path: str) -> Optional[str]:
+    """Stat massScavenge.js and return its (cached) content; runs on a worker thread"""
+    return _read_mass_scavenge(path, os.stat(path).st_mtime)
+
 
 class AutoScavenger(BaseAutomation):
     """Automates scavenging expeditions"""
@@ -24,65 +238,119 @@ class AutoScavenger(BaseAutomation):
     def url_pattern(self) -> str:
         return "screen=place&mode=scavenge_mass"
         
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Raw CDP session for helper calls, and the page it belongs to
+        self._cdp = None
+        self._cdp_page = None
+        # Private RNG plus timing config, read once for the whole run
+        self._rng = random.Random()
+        self._click_min = self.script_config['click_min_delay']
+        self._click_span = self.script_config['click_max_delay'] - self._click_min + 1
+        # Send click jitter: 300-1000ms
+        self._send_min = 300
+        self._send_span = 701
+        self._base_interval = self.script_config['base_interval_seconds']
+        self._jitter = self.script_config['interval_jitter_seconds']
+        self._screenshot_on_error = self.script_config.get('screenshot_on_error', False)
+        # Rotating suffix for error screenshots
+        self._error_shot_index = 0
+        # Background success-check/dialog-cleanup task from the last send
+        self._pending_cleanup: Optional[asyncio.Task] = None
+        
     async def run_automation(self):
         """Main automation loop"""
         consecutive_failures = 0
         max_consecutive_failures = 3
         
-        while self.running and self.is_within_active_hours():
-            try:
-                # Check if paused
-                if hasattr(self, 'paused') and self.paused:
-                    logger.debug(f"{self.name} is paused, waiting...")
-                    await asyncio.sleep(1)
-                    continue
-                    
-                # Run scavenging cycle
-                success = await self.run_scavenge_cycle()
+        while self.running:
+            # Outside active hours, sleep straight through to the next start
+            if not self.is_within_active_hours():
+                logger.info("🌙 %s outside active hours, sleeping %.0fs", self.name, self.seconds_until_active())
+                await self.sleep_until_active()
+                continue
                 
-                if success:
-                    consecutive_failures = 0
-                    # Increment run count for successful scavenges
-                    self.run_count += 1
-                    self.last_run_time = datetime.now()
-                    logger.debug(f"✅ {self.name} completed run #{self.run_count}")
-                else:
-                    consecutive_failures += 1
-                    if consecutive_failures >= max_consecutive_failures:
-                        logger.error(f"❌ {max_consecutive_failures} consecutive failures, stopping")
-                        self.running = False
-                        break
-                    logger.warning(f"⚠️ Scavenge failed ({consecutive_failures}/{max_consecutive_failures})")
+            # Wait while paused
+            if not self._pause_event.is_set():
+                logger.debug("%s is paused, waiting...", self.name)
+                await self._pause_event.wait()
+                continue
                 
-                # Calculate next interval with jitter
-                base_interval = self.script_config['base_interval_seconds']
-                jitter = random.random() * self.script_config['interval_jitter_seconds']
-                total_interval = base_interval + jitter
+            # Run scavenging cycle; an unexpected error counts as a failure
+            # and is retried sooner than a normal interval
+            retry_delay = None
+            try:
+                success = await self.run_scavenge_cycle()
+            except Exception as e:
+                logger.error("❌ Error in scavenge cycle: %s", e, exc_info=True)
+                success = False
+                retry_delay = 30
                 
-                logger.info(f"⏳ Waiting {total_interval:.1f}s until next scavenge")
-                await asyncio.sleep(total_interval)
+            consecutive_failures = 0 if success else consecutive_failures + 1
+            
+            if success:
+                # Increment run count for successful scavenges
+                self.run_count += 1
+                self.last_run_time = datetime.now()
+                logger.debug("✅ %s completed run #%d", self.name, self.run_count)
+            elif consecutive_failures >= max_consecutive_failures:
+                logger.error("❌ %d consecutive failures, stopping", max_consecutive_failures)
+                self.running = False
+                break
+            else:
+                logger.warning("⚠️ Scavenge failed (%d/%d)", consecutive_failures, max_consecutive_failures)
                 
-            except Exception as e:
-                logger.error(f"❌ Error in scavenge cycle: {e}", exc_info=True)
-                consecutive_failures += 1
-                await asyncio.sleep(30)
+            if retry_delay:
+                await asyncio.sleep(retry_delay)
+                continue
                 
+            # Calculate next interval with jitter
+            total_interval = self._base_interval + self._rng.random() * self._jitter
+            
+            logger.info("⏳ Waiting %.1fs until next scavenge", total_interval)
+            await asyncio.sleep(total_interval)
+            
+    async def stop(self):
+        """Stop the automation, dropping any pending dialog cleanup"""
+        if self._pending_cleanup:
+            self._pending_cleanup.cancel()
+            self._pending_cleanup = None
+        await self.detach_cdp()
+        await super().stop()
+        
+    async def confirm_and_cleanup(self):
+        """Log the success message and remove the scavenge dialogs"""
+        # Wait for UI update
+        await asyncio.sleep(2)
+        
+        success_msg = await self.page.evaluate(CONFIRM_AND_CLEANUP_JS)
+        if success_msg:
+            logger.info("✅ Success confirmed: %s", success_msg)
+            
     async def run_scavenge_cycle(self) -> bool:
         """Execute one scavenging cycle"""
         logger.info("🔍 Starting scavenge cycle")
         
         try:
+            # Settle the previous cycle's cleanup so its errors surface here
+            if self._pending_cleanup:
+                task, self._pending_cleanup = self._pending_cleanup, None
+                try:
+                    await task
+                except Exception as e:
+                    logger.warning("⚠️ Previous dialog cleanup failed: %s", e)
+                    
             # Load massScavenge.js
             if not await self.load_mass_scavenge_script():
                 return False
+                
+            await self.install_helpers(SCAVENGE_HELPERS_JS)
             
             # Wait for script to initialize
             await self.human_delay(2000, 4000)
             
             # Verify script loaded
-            script_loaded = await self.page.evaluate("""
-                () => typeof readyToSend !== 'undefined' && typeof sendGroup !== 'undefined'
-            """)
+            script_loaded = await self.call_helper(IS_SCRIPT_LOADED_EXPR)
             
             if not script_loaded:
                 logger.error("❌ Mass scavenge script did not load properly")
@@ -92,50 +360,71 @@ class AutoScavenger(BaseAutomation):
             return await self.execute_click_sequence()
             
         except Exception as e:
-            logger.error(f"❌ Error in scavenge cycle: {e}", exc_info=True)
-            # Take screenshot for debugging
-            await self.page.screenshot(path=f"scavenge_error_{self.attempts}.png")
+            logger.error("❌ Error in scavenge cycle: %s", e, exc_info=True)
+            # Take screenshot for debugging, rotating through the last 5
+            if self._screenshot_on_error:
+                self._error_shot_index = (self._error_shot_index + 1) % 5
+                await self.page.screenshot(path=f"scavenge_error_{self._error_shot_index}.jpg",
+                                           type='jpeg', quality=40, full_page=False)
             return False
         
     async def load_mass_scavenge_script(self) -> bool:
         """Load the massScavenge.js script with error handling"""
         script_path = os.path.join('vendor', 'massScavenge.js')
         
-        if not os.path.exists(script_path):
-            logger.error("❌ massScavenge.js not found in vendor/")
-            return False
-            
         try:
-            # Try different encodings
-            encodings = ['utf-8', 'utf-8-sig', 'latin-1', 'cp1252']
-            script_content = None
-            
-            for encoding in encodings:
-                try:
-                    with open(script_path, 'r', encoding=encoding) as f:
-                        script_content = f.read()
-                    logger.debug(f"✅ Loaded massScavenge.js with {encoding} encoding")
-                    break
-                except UnicodeDecodeError:
-                    continue
+            # Re-read only when the file has changed; disk access stays off the loop
+            script_content = await asyncio.get_running_loop().run_in_executor(
+                None, _load_mass_scavenge, script_path
+            )
                     
             if not script_content:
                 logger.error("❌ Could not read massScavenge.js with any encoding")
                 return False
             
-            # Remove javascript: prefix if present
-            if script_content.strip().startswith('javascript:'):
-                script_content = script_content.strip()[11:]
-            
-            # Inject script into page
-            await self.page.evaluate(script_content)
+            # Only ship the full source when this document doesn't hold it yet
+            if not await self.page.evaluate(RUN_STORED_SCRIPT_JS):
+                await self.page.evaluate(STORE_AND_RUN_SCRIPT_JS, script_content)
+                logger.debug("✅ Injected massScavenge.js into page")
             logger.debug("✅ Loaded massScavenge.js")
             return True
             
+        except FileNotFoundError:
+            logger.error("❌ massScavenge.js not found in vendor/")
+            return False
+            
         except Exception as e:
-            logger.error(f"❌ Failed to load massScavenge.js: {e}", exc_info=True)
+            logger.error("❌ Failed to load massScavenge.js: %s", e, exc_info=True)
             return False
         
+    async def detach_cdp(self):
+        """Detach the cached CDP session, if any"""
+        cdp, self._cdp, self._cdp_page = self._cdp, None, None
+        if cdp is None:
+            return
+        try:
+            await cdp.detach()
+        except PlaywrightError as e:
+            # Already gone with its page
+            logger.debug("CDP session detach failed: %s", e)
+            
+    async def call_helper(self, expression: str):
+        """Evaluate a helper call over the page's CDP session and return its value"""
+        if self._cdp_page is not self.page:
+            await self.detach_cdp()
+            self._cdp = await self.page.context.new_cdp_session(self.page)
+            self._cdp_page = self.page
+            
+        result = await self._cdp.send('Runtime.evaluate', {
+            'expression': expression,
+            'returnByValue': True,
+        })
+        if 'exceptionDetails' in result:
+            details = result['exceptionDetails']
+            message = details.get('exception', {}).get('description') or details.get('text')
+            raise RuntimeError(f"Helper call failed: {message}")
+        return result['result'].get('value')
+        
     async def execute_click_sequence(self) -> bool:
         """Execute the scavenging click sequence with better dialog handling"""
         try:
@@ -147,196 +436,59 @@ class AutoScavenger(BaseAutomation):
                 
             logger.info("✅ Mass scavenge dialog found")
             
-            # Make sure dialog is visible and centered
-            await self.page.evaluate("""
-                const dialog = document.querySelector('#massScavengeSophie');
-                if (dialog) {
-                    // Ensure it's visible
-                    dialog.style.display = 'block';
-                    dialog.style.visibility = 'visible';
-                    dialog.style.opacity = '1';
-                    dialog.style.zIndex = '9999';
-                    
-                    // Move to center of viewport
-                    dialog.style.position = 'fixed';
-                    dialog.style.left = '50%';
-                    dialog.style.top = '50%';
-                    dialog.style.transform = 'translate(-50%, -50%)';
-                    
-                    // Focus the dialog
-                    dialog.focus();
-                }
-            """)
-            
             # First click - readyToSend()
-            first_delay = random.randint(
-                self.script_config['click_min_delay'],
-                self.script_config['click_max_delay']
-            )
+            first_delay = self._click_min + int(self._rng.random() * self._click_span)
             
+            # Jitter sleeps are deliberate human-like gaps, keep them exact
             await asyncio.sleep(first_delay / 1000)
             
-            # Click using JavaScript for reliability
-            ready_result = await self.page.evaluate("""
-                () => {
-                    // Try multiple selectors
-                    const selectors = [
-                        'input.btnSophie[onclick="readyToSend()"]',
-                        'input[onclick="readyToSend()"]',
-                        '#sendMass',
-                        'input[value*="Calcola"]',  // Italian
-                        'input[value*="Calculate"]',  // English
-                        '#massScavengeSophie input.btnSophie'
-                    ];
-                    
-                    for (const selector of selectors) {
-                        const button = document.querySelector(selector);
-                        if (button) {
-                            button.click();
-                            return { success: true, selector: selector };
-                        }
-                    }
-                    
-                    // Debug info
-                    const buttons = document.querySelectorAll('input[type="button"]');
-                    return { 
-                        success: false, 
-                        error: 'No button found',
-                        buttonCount: buttons.length,
-                        buttons: Array.from(buttons).slice(0, 5).map(b => ({
-                            value: b.value,
-                            onclick: b.getAttribute('onclick'),
-                            className: b.className
-                        }))
-                    };
-                }
-            """)
+            # Click readyToSend() in one round-trip
+            ready_result = await self.call_helper(DO_READY_TO_SEND_EXPR)
             
             if not ready_result['success']:
-                logger.error(f"❌ readyToSend() button not found: {ready_result}")
+                logger.error("❌ readyToSend() button not found: %s", ready_result)
                 return False
                 
-            logger.info(f"✅ Clicked readyToSend() with selector: {ready_result['selector']}")
-            
-            # Wait for calculation to complete and new dialog to appear
-            await asyncio.sleep(5)
+            logger.info("✅ Clicked readyToSend() with selector: %s", ready_result['selector'])
             
-            # Look for the final dialog
-            final_dialog = await self.page.query_selector('#massScavengeFinal')
+            # Wait for calculation to complete and the final dialog to appear
+            try:
+                final_dialog = await self.page.wait_for_selector('#massScavengeFinal', timeout=10000)
+            except PlaywrightTimeoutError:
+                final_dialog = None
+                
             if not final_dialog:
                 logger.warning("⚠️ Final scavenge dialog did not appear")
                 
                 # Check if there was an error or no troops
-                error_msg = await self.page.evaluate("""
-                    () => {
-                        const errors = document.querySelectorAll('.error, .error_box, .warn');
-                        for (const error of errors) {
-                            if (error.textContent && error.textContent.trim()) {
-                                return error.textContent.trim();
-                            }
-                        }
-                        return null;
-                    }
-                """)
+                error_msg = await self.call_helper(LAST_ERROR_EXPR)
                 
                 if error_msg:
-                    logger.warning(f"⚠️ Scavenge error: {error_msg}")
+                    logger.warning("⚠️ Scavenge error: %s", error_msg)
                     
                 return False
                 
             logger.info("✅ Final scavenge dialog appeared")
             
-            # Make sure final dialog is visible
-            await self.page.evaluate("""
-                const dialog = document.querySelector('#massScavengeFinal');
-                if (dialog) {
-                    dialog.style.display = 'block';
-                    dialog.style.visibility = 'visible';
-                    dialog.style.opacity = '1';
-                    dialog.style.zIndex = '10000';
-                    dialog.style.position = 'fixed';
-                    dialog.style.left = '50%';
-                    dialog.style.top = '50%';
-                    dialog.style.transform = 'translate(-50%, -50%)';
-                }
-            """)
-            
             # Second click - sendGroup()
-            second_delay = random.randint(300, 1000)
+            second_delay = self._send_min + int(self._rng.random() * self._send_span)
             await asyncio.sleep(second_delay / 1000)
             
             # Click the first send group button
-            send_result = await self.page.evaluate("""
-                () => {
-                    // Try multiple selectors for send button
-                    const selectors = [
-                        'input[onclick="sendGroup(0,false)"]',
-                        'input[onclick^="sendGroup"][onclick*="false"]',
-                        '#sendMass',
-                        'input.btnSophie[value*="Lanseaza"]',  // Romanian
-                        'input.btnSophie[value*="Launch"]',  // English
-                        'input.btnSophie[value*="Lancia"]',  // Italian
-                        '#massScavengeFinal input[onclick^="sendGroup"]'
-                    ];
-                    
-                    for (const selector of selectors) {
-                        const button = document.querySelector(selector);
-                        if (button && !button.disabled) {
-                            button.click();
-                            return { success: true, selector: selector };
-                        }
-                    }
-                    
-                    // Debug info
-                    const sendButtons = document.querySelectorAll('input[onclick*="sendGroup"]');
-                    return { 
-                        success: false, 
-                        error: 'No send button found',
-                        buttonCount: sendButtons.length,
-                        buttons: Array.from(sendButtons).map(b => ({
-                            value: b.value,
-                            onclick: b.getAttribute('onclick'),
-                            disabled: b.disabled
-                        }))
-                    };
-                }
-            """)
+            send_result = await self.call_helper(DO_SEND_GROUP_EXPR)
             
             if send_result['success']:
-                logger.info(f"✅ Clicked sendGroup() with selector: {send_result['selector']}")
-                logger.info(f"✅ Total click time: {first_delay + second_delay}ms")
+                logger.info("✅ Clicked sendGroup() with selector: %s", send_result['selector'])
+                logger.info("✅ Total click time: %dms", first_delay + second_delay)
                 logger.info("✅ Scavenge expedition sent")
                 
-                # Wait for UI update
-                await asyncio.sleep(2)
-                
-                # Check for success message
-                success_msg = await self.page.evaluate("""
-                    () => {
-                        const msg = document.querySelector('.success_msg, .autoHideBox.success');
-                        return msg ? msg.textContent : null;
-                    }
-                """)
-                
-                if success_msg:
-                    logger.info(f"✅ Success confirmed: {success_msg}")
-                    
-                # Clean up dialogs
-                await self.page.evaluate("""
-                    () => {
-                        const dialogs = ['#massScavengeSophie', '#massScavengeFinal'];
-                        dialogs.forEach(selector => {
-                            const dialog = document.querySelector(selector);
-                            if (dialog) dialog.remove();
-                        });
-                    }
-                """)
-                    
+                # Confirm and clean up in the background; awaited next cycle
+                self._pending_cleanup = asyncio.create_task(self.confirm_and_cleanup())
                 return True
             else:
-                logger.error(f"❌ sendGroup() failed: {send_result}")
+                logger.error("❌ sendGroup() failed: %s", send_result)
                 return False
                 
         except Exception as e:
-            logger.error(f"❌ Error in click sequence: {e}", exc_info=True)
+            logger.error("❌ Error in click sequence: %s", e, exc_info=True)
             return False
\ No newline at end of file
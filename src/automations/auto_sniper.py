@@ -2,8 +2,10 @@
 Auto Sniper - Example automation using the sniper service for precise attacks
 """
 import asyncio
-from datetime import datetime, timedelta, timezone
-from typing import Dict, List, Optional, Any
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Any, Tuple
 import random
 
 from ..core.base_automation import BaseAutomation
@@ -11,6 +13,87 @@ from ..utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Incomings parsing helpers, installed once per page: parse() reads attack
+# rows out of a document (live or DOMParser-built), fetch() loads the
+# incomings overview without rendering or navigating the page and returns
+# null when the response isn't usable HTML
+INCOMINGS_HELPERS_JS = """
+    const ID_RE = /id=(\\d+)/;
+    
+    const parse = (doc) => {
+        const attacks = [];
+        const rows = doc.querySelectorAll('#incomings_table tr');
+        
+        for (const row of rows) {
+            try {
+                const attackElement = row.querySelector('a[href*="screen=info_command"]');
+                if (!attackElement) continue;
+                
+                const villageLinks = row.querySelectorAll('a[href*="screen=info_village"]');
+                const sourceElement = villageLinks[0];
+                const targetElement = villageLinks[1];
+                const timeElement = row.querySelector('.timer, [data-endtime]');
+                
+                if (sourceElement && targetElement && timeElement) {
+                    // Extract village IDs from hrefs
+                    const sourceMatch = sourceElement.href.match(ID_RE);
+                    const targetMatch = targetElement.href.match(ID_RE);
+                    
+                    // Extract arrival time
+                    let arrivalTime = null;
+                    if (timeElement.dataset.endtime) {
+                        arrivalTime = Number(timeElement.dataset.endtime) * 1000;
+                    } else {
+                        // Parse timer format like "1:23:45"
+                        const parts = timeElement.textContent.trim().split(':').map(Number);
+                        if (parts.length >= 3) {
+                            const totalSeconds = parts[0] * 3600 + parts[1] * 60 + parts[2];
+                            arrivalTime = Date.now() + (totalSeconds * 1000);
+                        }
+                    }
+                    
+                    if (sourceMatch && targetMatch && arrivalTime) {
+                        attacks.push({
+                            source_village_id: Number(sourceMatch[1]),
+                            target_village_id: Number(targetMatch[1]),
+                            arrival_time: arrivalTime,
+                            attack_element: attackElement.href
+                        });
+                    }
+                }
+            } catch (e) {
+                console.warn('Error parsing attack row:', e);
+            }
+        }
+        
+        return attacks;
+    };
+    
+    const fetchIncomings = async (url) => {
+        const response = await fetch(url, { credentials: 'same-origin' });
+        const contentType = response.headers.get('content-type') || '';
+        if (!response.ok || !contentType.includes('html')) return null;
+        
+        return parse(new DOMParser().parseFromString(await response.text(), 'text/html'));
+    };
+    
+    tb.incomings = { parse, fetch: fetchIncomings };
+"""
+
+# Landed attacks are forgotten after this long; hard cap on remembered attacks
+KNOWN_TARGET_TTL_MS = 60 * 60 * 1000
+MAX_KNOWN_TARGETS = 10_000
+
+# Scheduled attacks are dropped this many seconds after their snipe time even
+# without a completed/failed status from the service
+SCHEDULED_ATTACK_GRACE = 5 * 60
+
+# The loop wakes this many seconds before each scheduled snipe to re-check it
+SNIPE_PREP_LEAD = 30
+
+# Snipes launching sooner than this (ms) can't be prepared in time
+MIN_SNIPE_LEAD_MS = 60_000
+
 
 class AutoSniper(BaseAutomation):
     """Automated sniper using the high-precision Rust service"""
@@ -33,110 +116,111 @@ class AutoSniper(BaseAutomation):
         self.min_units_threshold = self.sniper_config.get('min_units_threshold', 100)  # Minimum units to launch
         self.timing_offset_ms = self.sniper_config.get('timing_offset_ms', -500)  # Launch 500ms before landing
         
-        # Target tracking
-        self.known_targets: Dict[int, Dict[str, Any]] = {}
-        self.scheduled_attacks: List[str] = []  # Track our attack IDs
+        # Target tracking by (source, target, arrival ms), insertion ordered so
+        # the oldest can be evicted first
+        self.known_targets: Dict[Tuple[int, int, int], Dict[str, Any]] = OrderedDict()
+        # Our attack IDs -> {'snipe_deadline' (monotonic), 'source', 'target'}
+        self.scheduled_attacks: Dict[str, Dict[str, Any]] = {}
+        
+        # Short-lived lookups reused across the attacks of one scan:
+        # village_id -> (monotonic time, available units) and (monotonic time, village_id).
+        # Units taken by snipes of the current scan are deducted from the cache
+        self._cache_ttl = self.check_interval * 0.5
+        self._unit_cache: Dict[int, Tuple[float, Dict[str, int]]] = {}
+        self._current_village: Optional[Tuple[float, int]] = None
+        # Monotonic time of the next full scan
+        self._next_scan_deadline = 0.0
         
     async def run_automation(self):
         """Main sniper automation loop"""
         while self.running and self.is_within_active_hours():
             try:
                 # Check if paused
-                if hasattr(self, 'paused') and self.paused:
+                if self.paused:
                     logger.debug(f"{self.name} is paused, waiting...")
                     await asyncio.sleep(1)
                     continue
                     
-                # Monitor for sniping opportunities
-                await self.scan_for_targets()
+                # Monitor for sniping opportunities when the scan is due
+                if time.monotonic() >= self._next_scan_deadline:
+                    self._next_scan_deadline = time.monotonic() + self.check_interval
+                    await self.scan_for_targets()
+                    
+                    # Increment run count
+                    self.run_count += 1
+                    self.last_run_time = datetime.now()
+                    logger.debug(f"✅ {self.name} completed scan #{self.run_count}")
                 
                 # Check on scheduled attacks
                 await self.monitor_scheduled_attacks()
                 
-                # Increment run count
-                self.run_count += 1
-                self.last_run_time = datetime.now()
-                logger.debug(f"✅ {self.name} completed scan #{self.run_count}")
-                
-                # Wait before next scan
-                await asyncio.sleep(self.check_interval)
+                # Sleep until the next scan or snipe preparation, whichever is first
+                await asyncio.sleep(self.seconds_until_next_wake())
                     
             except Exception as e:
                 logger.error(f"❌ Error in sniper loop: {e}", exc_info=True)
                 self.error_count += 1
                 await asyncio.sleep(30)  # Error recovery delay
                 
+    def seconds_until_next_wake(self) -> float:
+        """Seconds until the next scan deadline or snipe preparation time"""
+        sleep_for = self._next_scan_deadline - time.monotonic()
+        
+        now = time.monotonic()
+        prep_times = [
+            meta['snipe_deadline'] - SNIPE_PREP_LEAD for meta in self.scheduled_attacks.values()
+            if meta['snipe_deadline'] - SNIPE_PREP_LEAD > now
+        ]
+        if prep_times:
+            sleep_for = min(sleep_for, min(prep_times) - now)
+            
+        return max(1.0, sleep_for)
+        
     async def scan_for_targets(self):
         """Scan for incoming attacks that can be sniped"""
         try:
-            # Navigate to incoming attacks view
-            await self.navigate_to_url("screen=overview_villages&mode=incomings")
-            await asyncio.sleep(2)
+            # Forget attacks that have already landed
+            self.prune_known_targets()
             
             # Extract incoming attacks data
             incoming_attacks = await self.extract_incoming_attacks()
             
+            # Work out every snipe first, then schedule them in one request
+            snipes = []
             for attack in incoming_attacks:
-                await self.evaluate_snipe_opportunity(attack)
+                snipe = await self.evaluate_snipe_opportunity(attack)
+                if snipe:
+                    # Commit the units now so later attacks in this scan can't reuse them
+                    self.adjust_cached_units(snipe['source_village_id'], snipe['units'], -1)
+                    snipes.append(snipe)
+                    
+            if snipes:
+                await self.schedule_snipe_attacks(snipes)
                 
         except Exception as e:
             logger.error(f"Error scanning for targets: {e}", exc_info=True)
             
+    def prune_known_targets(self):
+        """Drop remembered attacks that landed over an hour ago"""
+        cutoff = time.time() * 1000 - KNOWN_TARGET_TTL_MS
+        for attack_key in [k for k, v in self.known_targets.items() if v['arrival_time'] < cutoff]:
+            del self.known_targets[attack_key]
+            
     async def extract_incoming_attacks(self) -> List[Dict[str, Any]]:
         """Extract incoming attacks from the page"""
         try:
-            # Extract attack data using JavaScript
-            attacks_data = await self.page.evaluate("""
-                () => {
-                    const attacks = [];
-                    const rows = document.querySelectorAll('#incomings_table tr');
-                    
-                    for (const row of rows) {
-                        try {
-                            const attackElement = row.querySelector('a[href*="screen=info_command"]');
-                            if (!attackElement) continue;
-                            
-                            const sourceElement = row.querySelector('a[href*="screen=info_village"]');
-                            const targetElement = row.querySelectorAll('a[href*="screen=info_village"]')[1];
-                            const timeElement = row.querySelector('.timer, [data-endtime]');
-                            
-                            if (sourceElement && targetElement && timeElement) {
-                                // Extract village IDs from hrefs
-                                const sourceMatch = sourceElement.href.match(/id=(\\d+)/);
-                                const targetMatch = targetElement.href.match(/id=(\\d+)/);
-                                
-                                // Extract arrival time
-                                let arrivalTime = null;
-                                if (timeElement.dataset.endtime) {
-                                    arrivalTime = parseInt(timeElement.dataset.endtime) * 1000;
-                                } else {
-                                    // Parse timer format like "1:23:45"
-                                    const timerText = timeElement.textContent.trim();
-                                    const parts = timerText.split(':').map(p => parseInt(p));
-                                    if (parts.length >= 3) {
-                                        const totalSeconds = parts[0] * 3600 + parts[1] * 60 + parts[2];
-                                        arrivalTime = Date.now() + (totalSeconds * 1000);
-                                    }
-                                }
-                                
-                                if (sourceMatch && targetMatch && arrivalTime) {
-                                    attacks.push({
-                                        source_village_id: parseInt(sourceMatch[1]),
-                                        target_village_id: parseInt(targetMatch[1]),
-                                        arrival_time: arrivalTime,
-                                        attack_element: attackElement.href
-                                    });
-                                }
-                            }
-                        } catch (e) {
-                            console.warn('Error parsing attack row:', e);
-                        }
-                    }
-                    
-                    return attacks;
-                }
-            """)
+            # Fetch and parse the overview in the page's session, no navigation
+            url = f"/game.php?village={self.village_id}&screen=overview_villages&mode=incomings"
+            await self.install_helpers(INCOMINGS_HELPERS_JS)
+            attacks_data = await self.page.evaluate("(url) => window.__tb.incomings.fetch(url)", url)
             
+            if attacks_data is None:
+                # Fall back to rendering the overview and parsing the live page
+                logger.debug("Incomings fetch returned no HTML, navigating instead")
+                await self.navigate_to_url("screen=overview_villages&mode=incomings")
+                await asyncio.sleep(2)
+                attacks_data = await self.page.evaluate("() => window.__tb.incomings.parse(document)")
+                
             logger.debug(f"Found {len(attacks_data)} incoming attacks")
             return attacks_data
             
@@ -144,25 +228,24 @@ class AutoSniper(BaseAutomation):
             logger.error(f"Error extracting attacks: {e}")
             return []
             
-    async def evaluate_snipe_opportunity(self, attack: Dict[str, Any]):
-        """Evaluate if an incoming attack can be sniped"""
+    async def evaluate_snipe_opportunity(self, attack: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Evaluate if an incoming attack can be sniped; returns the snipe to schedule"""
         try:
             target_village_id = attack['target_village_id']
             arrival_time = attack['arrival_time']
             
             # Check if this is a new attack or updated timing
-            attack_key = f"{attack['source_village_id']}_{target_village_id}_{arrival_time}"
+            attack_key = (attack['source_village_id'], target_village_id, arrival_time)
             if attack_key in self.known_targets:
                 return  # Already processed this attack
                 
-            # Calculate when to launch snipe (with timing offset)
-            arrival_datetime = datetime.fromtimestamp(arrival_time / 1000, tz=timezone.utc)
-            snipe_time = arrival_datetime + timedelta(milliseconds=self.timing_offset_ms)
+            # Calculate when to launch snipe (with timing offset), in epoch ms
+            snipe_time_ms = arrival_time + self.timing_offset_ms
             
             # Check if we have enough time to prepare (at least 1 minute)
-            time_until_snipe = (snipe_time - datetime.now(timezone.utc)).total_seconds()
-            if time_until_snipe < 60:
-                logger.debug(f"Attack on {target_village_id} too soon to snipe ({time_until_snipe:.1f}s)")
+            time_until_snipe_ms = snipe_time_ms - time.time_ns() // 1_000_000
+            if time_until_snipe_ms < MIN_SNIPE_LEAD_MS:
+                logger.debug(f"Attack on {target_village_id} too soon to snipe ({time_until_snipe_ms / 1000:.1f}s)")
                 return
                 
             # Find our closest village to the target
@@ -177,25 +260,19 @@ class AutoSniper(BaseAutomation):
                 logger.debug(f"No units available for sniping from village {snipe_source['village_id']}")
                 return
                 
-            # Schedule the snipe attack
-            await self.schedule_snipe_attack(
-                source_village_id=snipe_source['village_id'],
-                target_village_id=target_village_id,
-                units=snipe_units,
-                execute_at=snipe_time,
-                original_attack=attack
-            )
-            
-            # Remember this target
-            self.known_targets[attack_key] = {
+            return {
+                'attack_key': attack_key,
+                'source_village_id': snipe_source['village_id'],
                 'target_village_id': target_village_id,
-                'arrival_time': arrival_time,
-                'snipe_scheduled': True,
-                'snipe_time': snipe_time
+                'units': snipe_units,
+                'execute_at': datetime.fromtimestamp(snipe_time_ms / 1000, tz=timezone.utc),
+                'snipe_deadline': time.monotonic() + time_until_snipe_ms / 1000,
+                'original_attack': attack
             }
             
         except Exception as e:
             logger.error(f"Error evaluating snipe opportunity: {e}", exc_info=True)
+            return None
             
     async def find_best_snipe_source(self, target_village_id: int) -> Optional[Dict[str, Any]]:
         """Find the best village to launch snipe from"""
@@ -223,6 +300,9 @@ class AutoSniper(BaseAutomation):
         
     async def get_current_village_id(self) -> Optional[int]:
         """Get the current village ID"""
+        if self._current_village and time.monotonic() - self._current_village[0] < self._cache_ttl:
+            return self._current_village[1]
+            
         try:
             village_id = await self.page.evaluate("""
                 () => {
@@ -240,6 +320,8 @@ class AutoSniper(BaseAutomation):
                 }
             """)
             
+            if village_id:
+                self._current_village = (time.monotonic(), village_id)
             return village_id
             
         except Exception as e:
@@ -248,6 +330,10 @@ class AutoSniper(BaseAutomation):
             
     async def get_snipe_units(self, village_id: int) -> Optional[Dict[str, int]]:
         """Get available units for sniping from a village"""
+        cached = self._unit_cache.get(village_id)
+        if cached and time.monotonic() - cached[0] < self._cache_ttl:
+            return self.select_snipe_units(cached[1])
+            
         try:
             # Navigate to place (command) screen for the village
             await self.navigate_to_url(f"village={village_id}&screen=place")
@@ -275,57 +361,84 @@ class AutoSniper(BaseAutomation):
                 }
             """)
             
-            # Filter for suitable snipe units (typically light cavalry for speed)
-            snipe_units = {}
-            
-            # Prioritize light cavalry, then heavy cavalry, then other fast units
-            unit_priority = ['light', 'heavy', 'spy', 'archer']
-            
-            for unit_type in unit_priority:
-                if unit_type in units and units[unit_type] >= self.min_units_threshold:
-                    snipe_units[unit_type] = min(units[unit_type], 500)  # Don't send too many
-                    break
-                    
-            return snipe_units if snipe_units else None
+            self._unit_cache[village_id] = (time.monotonic(), units)
+            return self.select_snipe_units(units)
             
         except Exception as e:
             logger.error(f"Error getting snipe units: {e}")
             return None
             
-    async def schedule_snipe_attack(
-        self,
-        source_village_id: int,
-        target_village_id: int,
-        units: Dict[str, int],
-        execute_at: datetime,
-        original_attack: Dict[str, Any]
-    ):
-        """Schedule a snipe attack using the sniper service"""
+    def select_snipe_units(self, units: Dict[str, int]) -> Optional[Dict[str, int]]:
+        """Filter available units for suitable snipe units (typically light cavalry for speed)"""
+        # Prioritize light cavalry, then heavy cavalry, then other fast units
+        unit_priority = ['light', 'heavy', 'spy', 'archer']
+        
+        for unit_type in unit_priority:
+            if unit_type in units and units[unit_type] >= self.min_units_threshold:
+                return {unit_type: min(units[unit_type], 500)}  # Don't send too many
+        return None
+        
+    def adjust_cached_units(self, village_id: int, units: Dict[str, int], sign: int):
+        """Deduct (sign=-1) or return (sign=1) snipe units in the village's cached counts"""
+        cached = self._unit_cache.get(village_id)
+        if not cached:
+            return
+        available = cached[1]
+        for unit_type, count in units.items():
+            available[unit_type] = max(available.get(unit_type, 0) + sign * count, 0)
+            
+    async def schedule_snipe_attacks(self, snipes: List[Dict[str, Any]]):
+        """Schedule snipe attacks using the sniper service in a single batch"""
         try:
             # Get sniper manager from scheduler
             sniper_manager = self.browser_manager.scheduler.sniper_manager
             
-            # Schedule the attack with high priority
-            attack_id = await sniper_manager.schedule_attack(
-                target_village_id=target_village_id,
-                source_village_id=source_village_id,
-                attack_type="attack",
-                units=units,
-                execute_at=execute_at,
-                priority=200  # High priority for snipes
-            )
+            # Schedule the attacks with high priority
+            attack_ids = await sniper_manager.schedule_attacks_batch([
+                {
+                    'target_village_id': snipe['target_village_id'],
+                    'source_village_id': snipe['source_village_id'],
+                    'attack_type': "attack",
+                    'units': snipe['units'],
+                    'execute_at': snipe['execute_at'],
+                    'priority': 200  # High priority for snipes
+                }
+                for snipe in snipes
+            ])
             
-            if attack_id:
-                self.scheduled_attacks.append(attack_id)
-                logger.info(f"🎯 Scheduled snipe attack {attack_id}: "
-                          f"{source_village_id} -> {target_village_id} "
-                          f"at {execute_at.strftime('%H:%M:%S.%f')[:-3]} "
-                          f"with {units}")
-            else:
-                logger.error(f"Failed to schedule snipe attack")
+            for snipe, attack_id in zip(snipes, attack_ids):
+                source_village_id = snipe['source_village_id']
+                target_village_id = snipe['target_village_id']
+                execute_at = snipe['execute_at']
                 
+                if attack_id:
+                    self.scheduled_attacks[attack_id] = {
+                        'snipe_deadline': snipe['snipe_deadline'],
+                        'source': source_village_id,
+                        'target': target_village_id
+                    }
+                    logger.info(f"🎯 Scheduled snipe attack {attack_id}: "
+                              f"{source_village_id} -> {target_village_id} "
+                              f"at {execute_at.strftime('%H:%M:%S.%f')[:-3]} "
+                              f"with {snipe['units']}")
+                else:
+                    # Not sent after all, the units are free again
+                    self.adjust_cached_units(source_village_id, snipe['units'], 1)
+                    logger.error(f"Failed to schedule snipe attack {source_village_id} -> {target_village_id}")
+                    
         except Exception as e:
-            logger.error(f"Error scheduling snipe attack: {e}", exc_info=True)
+            logger.error(f"Error scheduling snipe attacks: {e}", exc_info=True)
+            
+        # Remember these targets
+        for snipe in snipes:
+            self.known_targets[snipe['attack_key']] = {
+                'target_village_id': snipe['target_village_id'],
+                'arrival_time': snipe['original_attack']['arrival_time'],
+                'snipe_scheduled': True,
+                'snipe_time': snipe['execute_at']
+            }
+        while len(self.known_targets) > MAX_KNOWN_TARGETS:
+            self.known_targets.popitem(last=False)
             
     async def monitor_scheduled_attacks(self):
         """Monitor our scheduled attacks and remove completed ones"""
@@ -335,22 +448,30 @@ class AutoSniper(BaseAutomation):
                 
             sniper_manager = self.browser_manager.scheduler.sniper_manager
             
-            # Check status of each attack
-            completed_attacks = []
-            for attack_id in self.scheduled_attacks:
-                try:
-                    if sniper_manager.client:
-                        status = await sniper_manager.client.get_attack_status(attack_id)
-                        if status and status.get('status') in ['completed', 'failed']:
-                            completed_attacks.append(attack_id)
-                            logger.info(f"🏁 Attack {attack_id} {status.get('status')}")
-                except Exception as e:
-                    logger.debug(f"Error checking attack {attack_id}: {e}")
+            # Attacks well past their snipe time are not coming back
+            stale_before = time.monotonic() - SCHEDULED_ATTACK_GRACE
+            for attack_id in [a for a, meta in self.scheduled_attacks.items() if meta['snipe_deadline'] < stale_before]:
+                logger.debug(f"Dropping stale attack {attack_id}")
+                del self.scheduled_attacks[attack_id]
                     
-            # Remove completed attacks from tracking
-            for attack_id in completed_attacks:
-                self.scheduled_attacks.remove(attack_id)
+            if not sniper_manager.client:
+                return
                 
+            # Check status of all attacks concurrently
+            attack_ids = list(self.scheduled_attacks)
+            results = await asyncio.gather(
+                *(sniper_manager.client.get_attack_status(attack_id) for attack_id in attack_ids),
+                return_exceptions=True
+            )
+            
+            # Remove completed attacks from tracking
+            for attack_id, status in zip(attack_ids, results):
+                if isinstance(status, Exception):
+                    logger.debug(f"Error checking attack {attack_id}: {status}")
+                elif status and status.get('status') in ['completed', 'failed']:
+                    logger.info(f"🏁 Attack {attack_id} {status.get('status')}")
+                    self.scheduled_attacks.pop(attack_id, None)
+                    
         except Exception as e:
             logger.error(f"Error monitoring attacks: {e}")
             
@@ -363,13 +484,20 @@ class AutoSniper(BaseAutomation):
         
         sniper_manager = self.browser_manager.scheduler.sniper_manager
         
-        for attack_id in self.scheduled_attacks.copy():
-            try:
-                if sniper_manager.client:
-                    await sniper_manager.client.cancel_attack(attack_id)
-                self.scheduled_attacks.remove(attack_id)
-            except Exception as e:
-                logger.error(f"Error cancelling attack {attack_id}: {e}")
+        attack_ids = list(self.scheduled_attacks)
+        if sniper_manager.client:
+            results = await asyncio.gather(
+                *(sniper_manager.client.cancel_attack(attack_id) for attack_id in attack_ids),
+                return_exceptions=True
+            )
+        else:
+            results = [None] * len(attack_ids)
+            
+        for attack_id, result in zip(attack_ids, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error cancelling attack {attack_id}: {result}")
+            else:
+                self.scheduled_attacks.pop(attack_id, None)
                 
     async def stop(self):
         """Stop the automation and cancel scheduled attacks"""
@@ -2,15 +2,159 @@
 Captcha Detector - Fixed to monitor ALL Tribals pages including manual tabs
 """
 import asyncio
+import logging
 import time
-from typing import Set, Optional
-from playwright.async_api import Page
+from typing import Optional, Dict, Any, List, Tuple
+from playwright.async_api import Page, BrowserContext
+from playwright.async_api import Error as PlaywrightError
 
+from ..utils.helpers import TB_NAMESPACE_JS
 from ..utils.logger import setup_logger
 from ..utils.anti_detection import AntiDetectionManager
 
+try:
+    from .solver import CaptchaSolver
+except ImportError as e:
+    CaptchaSolver = None
+    _solver_import_error = e
+
 logger = setup_logger(__name__)
 
+# Generic (non bot protection) captcha widgets, tried in order
+CAPTCHA_SELECTORS = (
+    '.h-captcha',
+    'iframe[src*="hcaptcha"]',
+    'div[id*="hcaptcha"]',
+    '[data-hcaptcha-widget-id]',
+)
+
+# Full sweep interval while push notifications are active (safety net only),
+# and the polling interval used when they could not be installed
+WATCHED_SWEEP_INTERVAL = 30
+POLL_INTERVAL = 2
+
+# Watches each document for bot protection / captcha elements appearing (or
+# changing class/style) and notifies Python through the exposed binding
+CAPTCHA_WATCH_JS = """
+(() => {
+    // Hide Playwright's binding from enumeration in every frame. It must stay
+    // on the global: Playwright looks up its callbacks through it
+    const binding = window.__tbNotifyCaptcha;
+    if (binding) {
+        Object.defineProperty(window, '__tbNotifyCaptcha', {
+            value: binding, enumerable: false, writable: true, configurable: true
+        });
+    }
+    // Top document only; hCaptcha's own iframes are not watched. State lives
+    // in the shared non-enumerable window.__tb namespace
+    if (window.top !== window) return;
+    """ + TB_NAMESPACE_JS + """
+    if (tb.captchaObserver) return;
+    const watched = '#botprotection_quest, td.bot-protection-row, .h-captcha, ' +
+        'iframe[src*="hcaptcha"], div[id*="hcaptcha"], [data-hcaptcha-widget-id]';
+    // One notification per probe: the flag is cleared when the page is probed
+    const notify = () => {
+        if (tb.captchaDirty) return;
+        tb.captchaDirty = true;
+        if (!window.__tbNotifyCaptcha) return;
+        window.__tbNotifyCaptcha().catch(e => console.warn('captcha notify failed', e));
+    };
+    const start = () => {
+        if (document.querySelector(watched)) notify();
+        tb.captchaObserver = new MutationObserver(mutations => {
+            for (const mutation of mutations) {
+                if (mutation.type === 'attributes') {
+                    if (mutation.target.matches(watched)) return notify();
+                    continue;
+                }
+                for (const node of mutation.addedNodes) {
+                    if (node.nodeType === Node.ELEMENT_NODE &&
+                        (node.matches(watched) || node.querySelector(watched))) {
+                        return notify();
+                    }
+                }
+            }
+        });
+        tb.captchaObserver.observe(document.body || document.documentElement, {
+            childList: true,
+            subtree: true,
+            attributes: true,
+            attributeFilter: ['class', 'style']
+        });
+    };
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', start);
+    } else {
+        start();
+    }
+})();
+"""
+
+# Reads every bot protection / captcha indicator of a page in one round-trip.
+# Given the page's last clean fingerprint, returns null without running the
+# selectors if the URL and top-level DOM are unchanged and no watched mutation
+# happened since
+PROBE_PAGE_JS = """
+({captchaSelectors, lastSeen}) => {
+    const url = location.href;
+    const domVersion = document.body ? document.body.childElementCount : 0;
+    const tb = window.__tb;
+    if (lastSeen && lastSeen[0] === url && lastSeen[1] === domVersion && !(tb && tb.captchaDirty)) {
+        return null;
+    }
+    if (tb) tb.captchaDirty = false;
+    
+    const result = {
+        fingerprint: [url, domVersion],
+        botProtectionStart: false,
+        botProtectionActive: false,
+        questDetected: false,
+        captchaSelector: null
+    };
+    
+    // Bot protection page: start button or an active captcha in the row
+    const row = document.querySelector('td.bot-protection-row');
+    if (row) {
+        const startButton = row.querySelector('a.btn.btn-default');
+        const buttonText = startButton ? startButton.textContent.trim() : '';
+        result.botProtectionStart = /^(?:Inizio del controllo|Start)/.test(buttonText);
+        result.botProtectionActive = !!row.querySelector('.captcha');
+    }
+    
+    // Bot protection quest, only if clickable/active
+    const quest = document.querySelector('#botprotection_quest:not(.completed)');
+    result.questDetected = !!quest &&
+        !quest.classList.contains('disabled') &&
+        quest.style.display !== 'none';
+    
+    // Generic captcha that is visible and not inside bot protection, found in
+    // a single document pass over all selectors
+    for (const element of document.querySelectorAll(captchaSelectors.join(', '))) {
+        if (element.closest('.bot-protection-row')) continue;
+        
+        const rect = element.getBoundingClientRect();
+        if (rect.width > 0 && rect.height > 0 && getComputedStyle(element).visibility !== 'hidden') {
+            result.captchaSelector = captchaSelectors.find(selector => element.matches(selector));
+            break;
+        }
+    }
+    
+    return result;
+}
+"""
+
+# Installs the probe as window.__tb.captchaProbe (top frame only) so each poll
+# only sends the short CALL_PROBE_JS; pages loaded before the init script get
+# it on their first failed call
+INSTALL_PROBE_JS = """
+(() => {
+    if (window.top !== window) return;
+    """ + TB_NAMESPACE_JS + """
+    tb.captchaProbe = """ + PROBE_PAGE_JS.strip() + """;
+})();
+"""
+CALL_PROBE_JS = "(args) => window.__tb.captchaProbe(args)"
+
 
 class CaptchaDetector:
     """Detects captcha challenges and manages anti-detection during solving"""
@@ -18,10 +162,142 @@ class CaptchaDetector:
     def __init__(self, browser_manager):
         self.browser_manager = browser_manager
         self.monitoring = False
-        self.detected_captcha = False
-        self.monitored_pages: Set[Page] = set()
+        # Set while no detection is being handled (see detected_captcha)
+        self._handling_done = asyncio.Event()
+        self._handling_done.set()
         self.anti_detection_manager = AntiDetectionManager()
         self.last_bot_protection_time = 0  # Cooldown to prevent rapid re-triggering
+        # Upper bound on one solve (retries and manual solving included)
+        self.handling_timeout = browser_manager.config.get('captcha', {}).get('handling_timeout', 900)
+        # Solver shared by every detection, created on first use
+        self._captcha_solver = None
+        self._scheduler = None
+        # Pages whose watcher reported a possible captcha, and the context watched
+        self._events: asyncio.Queue = asyncio.Queue()
+        self._watched_context: Optional[BrowserContext] = None
+        # Context the notify binding is registered on (it can only be registered once)
+        self._binding_context: Optional[BrowserContext] = None
+        # id(page) -> (url, dom version) of its last clean probe
+        self._last_seen: Dict[int, Tuple[str, int]] = {}
+        # Open Tribals pages of the tracked context by id(page), kept current by page events
+        self._pages: Dict[int, Page] = {}
+        self._tracked_context: Optional[BrowserContext] = None
+        
+    def track_pages(self, context: BrowserContext):
+        """Keep the open page set current from context/page events instead of rescanning"""
+        if self._tracked_context is context:
+            return
+            
+        self._pages.clear()
+        self._last_seen.clear()
+        for page in context.pages:
+            self._on_new_page(page)
+        context.on("page", self._on_new_page)
+        self._tracked_context = context
+        
+    def _on_new_page(self, page: Page):
+        """Hook a page so it is (re)classified on navigation and forgotten on close"""
+        page_id = id(page)
+        self._classify_page(page)
+        
+        def on_navigated(frame):
+            if frame == page.main_frame:
+                self._last_seen.pop(page_id, None)
+                self._classify_page(page)
+                
+        def on_close(_):
+            self._pages.pop(page_id, None)
+            self._last_seen.pop(page_id, None)
+            
+        page.on("framenavigated", on_navigated)
+        page.on("close", on_close)
+        
+    def _classify_page(self, page: Page):
+        """Monitor only Tribals pages (not demo pages)"""
+        if 'tribals.it' in page.url:
+            self._pages[id(page)] = page
+        else:
+            self._pages.pop(id(page), None)
+        
+    async def install_watchers(self, context: BrowserContext):
+        """Push captcha notifications from every page of the context instead of polling"""
+        self.track_pages(context)
+        if self._watched_context is context:
+            return
+            
+        try:
+            if self._binding_context is not context:
+                await context.expose_binding('__tbNotifyCaptcha', self._on_captcha_event)
+                self._binding_context = context
+            await context.add_init_script(CAPTCHA_WATCH_JS)
+            await context.add_init_script(INSTALL_PROBE_JS)
+            # Pages that are already open only get the init script on their next load
+            for page in context.pages:
+                try:
+                    await page.evaluate(CAPTCHA_WATCH_JS)
+                except Exception as e:
+                    logger.debug("Could not install captcha watcher on open page: %s", e)
+            self._watched_context = context
+            logger.info("👁️ Installed captcha watchers")
+        except Exception as e:
+            logger.warning("⚠️ Could not install captcha watchers, falling back to polling: %s", e)
+            
+    def _on_captcha_event(self, source):
+        """Binding callback: queue the page that reported a possible captcha"""
+        self._events.put_nowait(source['page'])
+        
+    def _tribals_pages(self) -> List[Page]:
+        """All open Tribals pages of the main context"""
+        main_context = self.browser_manager.main_context
+        if not main_context:
+            return []
+            
+        # Already filtered as pages open, navigate and close
+        if main_context is self._tracked_context:
+            return list(self._pages.values())
+            
+        # Monitor only Tribals pages (not demo pages)
+        return [page for page in main_context.pages if not page.is_closed() and 'tribals.it' in page.url]
+        
+    def _source_name(self, page: Page) -> str:
+        """Descriptive name of a page, only worked out once something is found on it"""
+        for name, registered_page in self.browser_manager.pages.items():
+            if registered_page is page:
+                return name
+                
+        # If not registered, give it a descriptive name
+        game_page = getattr(self.browser_manager, 'game_page', None)
+        if game_page is not None and page == game_page:
+            return "main_game"
+        if 'game.php' in page.url:
+            return "manual_tab"
+        return "unknown_tab"
+        
+    @property
+    def detected_captcha(self) -> bool:
+        """Whether a detection is being handled or awaits manual intervention"""
+        return not self._handling_done.is_set()
+        
+    @detected_captcha.setter
+    def detected_captcha(self, value: bool):
+        if value:
+            self._handling_done.clear()
+        else:
+            self._handling_done.set()
+            
+    @property
+    def scheduler(self):
+        """The scheduler, cached once it has attached itself to the browser manager"""
+        if self._scheduler is None:
+            self._scheduler = getattr(self.browser_manager, 'scheduler', None)
+        return self._scheduler
+        
+    @property
+    def solver(self) -> 'CaptchaSolver':
+        """The shared CaptchaSolver (it keeps no per-solve state)"""
+        if self._captcha_solver is None:
+            self._captcha_solver = CaptchaSolver(self.browser_manager.config, self.anti_detection_manager)
+        return self._captcha_solver
         
     async def start_monitoring(self):
         """Start monitoring for captchas and bot protection"""
@@ -30,93 +306,144 @@ class CaptchaDetector:
         
         while self.monitoring:
             try:
-                # Skip if we're already handling something
-                if self.detected_captcha:
-                    await asyncio.sleep(5)
-                    continue
+                # Wait while we're already handling something
+                await self._handling_done.wait()
+                    
+                # Wait for a watcher notification; without watchers this is the
+                # plain polling interval, with them a rare full safety sweep
+                watched = self._watched_context is not None
+                try:
+                    event_page = await asyncio.wait_for(
+                        self._events.get(),
+                        WATCHED_SWEEP_INTERVAL if watched else POLL_INTERVAL
+                    )
+                except asyncio.TimeoutError:
+                    event_page = None
                     
                 # Get ALL pages from the browser context, not just registered ones
-                all_pages = []
-                
-                # Get pages from main context
-                if self.browser_manager.main_context:
-                    for page in self.browser_manager.main_context.pages:
-                        # Monitor only Tribals pages (not demo pages)
-                        if not page.is_closed() and 'tribals.it' in page.url:
-                            # Determine source name
-                            source_name = None
-                            # Check if it's a registered automation page
-                            for script_name, registered_page in self.browser_manager.pages.items():
-                                if registered_page == page:
-                                    source_name = script_name
-                                    break
-                            # If not registered, give it a descriptive name
-                            if not source_name:
-                                if hasattr(self.browser_manager, 'game_page') and page == self.browser_manager.game_page:
-                                    source_name = "main_game"
-                                elif 'game.php' in page.url:
-                                    source_name = "manual_tab"
-                                else:
-                                    source_name = "unknown_tab"
-                            
-                            all_pages.append((source_name, page))
+                all_pages = self._tribals_pages()
                 
-                # Check all pages for captcha/bot protection
-                for source_name, page in all_pages:
-                    try:
-                        # Check for bot protection page (with start button)
-                        if await self.check_for_bot_protection(page):
-                            logger.warning(f"🚨 Bot protection page detected on {source_name}")
-                            await self.handle_bot_protection(source_name, page)
-                            break  # Handle one at a time
-                            
-                        # Check for bot protection quest specifically (only if clickable/active)
-                        quest_element = await page.query_selector('#botprotection_quest:not(.completed)')
-                        if quest_element:
-                            # Double-check if it's actually clickable
-                            is_clickable = await page.evaluate("""
-                                () => {
-                                    const quest = document.querySelector('#botprotection_quest');
-                                    if (!quest) return false;
-                                    // Check if it's completed or disabled
-                                    return !quest.classList.contains('completed') && 
-                                           !quest.classList.contains('disabled') &&
-                                           quest.style.display !== 'none';
-                                }
-                            """)
-                            if is_clickable:
-                                # Check cooldown (30 seconds minimum between detections)
-                                current_time = time.time()
-                                if current_time - self.last_bot_protection_time < 30:
-                                    logger.debug(f"Bot protection cooldown active, skipping detection")
-                                    continue
-                                    
-                                self.last_bot_protection_time = current_time
-                                logger.warning(f"🚨 Bot protection quest detected on {source_name}")
-                                await self.handle_bot_protection(source_name, page)
-                                break  # Handle one at a time
-                            
-                        # Check for other types of captcha (not bot protection)
-                        if await self.check_page_for_captcha(page):
-                            logger.warning(f"🚨 Captcha detected on {source_name} page")
-                            await self.handle_captcha_detection(source_name, page)
-                            break  # Handle one at a time
-                            
-                    except Exception as e:
-                        logger.debug(f"Error checking page {source_name}: {e}")
-                        continue
-                            
-                await asyncio.sleep(2)  # Check every 2 seconds
+                if event_page is not None:
+                    # Only check the pages that reported something
+                    reported = {id(event_page)}
+                    while not self._events.empty():
+                        reported.add(id(self._events.get_nowait()))
+                    all_pages = [page for page in all_pages if id(page) in reported]
+                    
+                # Read all indicators of every page concurrently, skipping unchanged pages
+                skip_unchanged = event_page is None
+                probes = {
+                    asyncio.create_task(self.probe_page(page, skip_unchanged=skip_unchanged)): page
+                    for page in all_pages
+                }
                 
+                # Check pages as their probes come back; the first hit is handled
+                # and the remaining probes are dropped (handle one at a time)
+                pending = set(probes)
+                try:
+                    handled = False
+                    while pending and not handled:
+                        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                        for task in done:
+                            page = probes[task]
+                            if task.exception() is not None:
+                                if logger.isEnabledFor(logging.DEBUG):
+                                    logger.debug("Error checking page %s: %s", self._source_name(page), task.exception())
+                            elif not handled:
+                                handled = await self._dispatch_probe(page, task.result())
+                finally:
+                    for task in pending:
+                        task.cancel()
+                        
             except Exception as e:
-                logger.error(f"Error in captcha monitoring: {e}")
+                logger.error("Error in captcha monitoring: %s", e)
                 await asyncio.sleep(5)
                 
+    async def _dispatch_probe(self, page: Page, probe: Optional[Dict[str, Any]]) -> bool:
+        """Handle whatever a page's probe found; returns True if a handler ran"""
+        if probe is None:
+            return False  # Unchanged since its last clean probe
+            
+        if self._probe_is_clean(probe):
+            self._remember_clean_page(page, probe)
+            return False
+        self._last_seen.pop(id(page), None)
+        source_name = self._source_name(page)
+        
+        # Check for bot protection page (with start button)
+        if not self.detected_captcha and self._bot_protection_shown(probe):
+            logger.warning("🚨 Bot protection page detected on %s", source_name)
+            await self.handle_bot_protection(source_name, page)
+            return True
+            
+        # Check for bot protection quest specifically (only if clickable/active)
+        if probe['questDetected']:
+            # Check cooldown (30 seconds minimum between detections)
+            current_time = time.time()
+            if current_time - self.last_bot_protection_time < 30:
+                logger.debug("Bot protection cooldown active, skipping detection")
+                return False
+                
+            self.last_bot_protection_time = current_time
+            logger.warning("🚨 Bot protection quest detected on %s", source_name)
+            await self.handle_bot_protection(source_name, page)
+            return True
+            
+        # Check for other types of captcha (not bot protection)
+        if probe['captchaSelector']:
+            logger.debug("Generic captcha detected via %s", probe['captchaSelector'])
+            logger.warning("🚨 Captcha detected on %s page", source_name)
+            await self.handle_captcha_detection(source_name, page)
+            return True
+            
+        return False
+        
     def stop(self):
         """Stop monitoring"""
         self.monitoring = False
         logger.info("👁️ Stopped captcha monitoring")
         
+    async def probe_page(self, page: Page, skip_unchanged: bool = False) -> Optional[Dict[str, Any]]:
+        """Read bot protection, quest and captcha indicators in a single evaluate
+        
+        With skip_unchanged, returns None for a page unchanged since its last clean probe.
+        Only pages with a captcha watcher can be skipped: without one nothing marks the
+        page dirty when a captcha is inserted into existing markup.
+        """
+        watched = self._watched_context is not None and page.context is self._watched_context
+        args = {
+            'captchaSelectors': list(CAPTCHA_SELECTORS),
+            'lastSeen': self._last_seen.get(id(page)) if skip_unchanged and watched else None
+        }
+        try:
+            return await page.evaluate(CALL_PROBE_JS, args)
+        except PlaywrightError as e:
+            if 'TypeError' not in str(e):
+                raise
+            # Document loaded before the init script: install the probe once, then call again
+            await page.evaluate(INSTALL_PROBE_JS)
+            return await page.evaluate(CALL_PROBE_JS, args)
+        
+    @staticmethod
+    def _probe_is_clean(probe: Dict[str, Any]) -> bool:
+        """Whether a probe found no bot protection, quest or captcha"""
+        return not (probe['botProtectionStart'] or probe['botProtectionActive'] or
+                    probe['questDetected'] or probe['captchaSelector'])
+                    
+    def _remember_clean_page(self, page: Page, probe: Dict[str, Any]):
+        """Cache a clean page's fingerprint until the page changes, navigates or closes"""
+        self._last_seen[id(page)] = tuple(probe['fingerprint'])
+        
+    def _bot_protection_shown(self, probe: Dict[str, Any]) -> bool:
+        """Whether a probe shows the bot protection page (start button or active captcha)"""
+        if probe['botProtectionStart']:
+            logger.debug("Bot protection page with start button detected")
+            return True
+        if probe['botProtectionActive']:
+            logger.debug("Bot protection with active captcha detected")
+            return True
+        return False
+        
     async def check_for_bot_protection(self, page: Page) -> bool:
         """Check if bot protection page is shown (with start button)"""
         # Don't check if we're already handling it
@@ -124,108 +451,67 @@ class CaptchaDetector:
             return False
             
         try:
-            # Check for the bot protection row with the button
-            bot_protection = await page.query_selector('td.bot-protection-row')
-            if bot_protection:
-                # Check if the start button is present
-                start_button = await page.query_selector('td.bot-protection-row a.btn.btn-default')
-                if start_button:
-                    button_text = await start_button.text_content()
-                    if button_text and ('Inizio del controllo' in button_text or 'Start' in button_text):
-                        logger.debug("Bot protection page with start button detected")
-                        return True
-                        
-                # Also check if there's an active captcha in bot protection
-                captcha_div = await page.query_selector('td.bot-protection-row .captcha')
-                if captcha_div:
-                    logger.debug("Bot protection with active captcha detected")
-                    return True
-                        
-            return False
+            return self._bot_protection_shown(await self.probe_page(page))
             
         except Exception as e:
-            logger.debug(f"Error checking for bot protection: {e}")
+            logger.debug("Error checking for bot protection: %s", e)
             return False
         
     async def check_page_for_captcha(self, page: Page) -> bool:
         """Check if page has captcha (excluding bot protection)"""
         try:
-            # Note: Bot protection quest is now handled separately in the monitoring loop
-            # This function only checks for other types of captcha
-            
-            # Check for hCaptcha iframe (generic captcha)
-            captcha_selectors = [
-                '.h-captcha',
-                'iframe[src*="hcaptcha"]',
-                'div[id*="hcaptcha"]',
-                '[data-hcaptcha-widget-id]'
-            ]
-            
-            for selector in captcha_selectors:
-                element = await page.query_selector(selector)
-                if element:
-                    try:
-                        # Make sure it's not inside bot protection
-                        parent = await element.evaluate("""
-                            (el) => {
-                                let parent = el;
-                                for (let i = 0; i < 5; i++) {
-                                    parent = parent.parentElement;
-                                    if (!parent) break;
-                                    if (parent.classList.contains('bot-protection-row')) {
-                                        return true;
-                                    }
-                                }
-                                return false;
-                            }
-                        """)
-                        
-                        if not parent:  # Not inside bot protection
-                            if await element.is_visible():
-                                logger.debug(f"Generic captcha detected via {selector}")
-                                return True
-                    except:
-                        pass
-                        
+            selector = (await self.probe_page(page))['captchaSelector']
+            if selector:
+                logger.debug("Generic captcha detected via %s", selector)
+                return True
+                
         except Exception as e:
-            logger.debug(f"Error checking for captcha: {e}")
+            logger.debug("Error checking for captcha: %s", e)
             
         return False
         
     async def handle_bot_protection(self, source_name: str, page: Page):
         """Handle bot protection (both page and quest)"""
+        await self._handle_detection('bot_protection', source_name, page)
+        
+    async def handle_captcha_detection(self, source_name: str, page: Page):
+        """Handle generic captcha detection (not bot protection)"""
+        await self._handle_detection('captcha', source_name, page)
+        
+    async def _handle_detection(self, kind: str, source_name: str, page: Page):
+        """Suspend anti-detection and pause automations while the solver handles a detection"""
         if self.detected_captcha:
             return  # Already handling
             
+        bot_protection = kind == 'bot_protection'
+        label = "Bot protection" if bot_protection else "Captcha"
+        
         self.detected_captcha = True
-        logger.error(f"🚨 BOT PROTECTION DETECTED on {source_name}!")
+        logger.error("🚨 %s DETECTED on %s!", label.upper(), source_name)
         
         # SUSPEND ANTI-DETECTION BEFORE SOLVING
-        self.anti_detection_manager.suspend("bot_protection")
+        self.anti_detection_manager.suspend(kind)
         
-        # Avoid circular import by checking if solver is already imported
-        try:
-            from .solver import CaptchaSolver
-        except ImportError as e:
-            logger.error(f"❌ Cannot import CaptchaSolver: {e}")
+        if CaptchaSolver is None:
+            logger.error("❌ Cannot import CaptchaSolver: %s", _solver_import_error)
             self.anti_detection_manager.resume()  # Resume on error
             self.detected_captcha = False
             return
         
         # Pause all automations (don't stop them completely to keep pages open)
-        scheduler = getattr(self.browser_manager, 'scheduler', None)
+        scheduler = self.scheduler
         if scheduler:
-            await scheduler.pause_all_automations(f"Bot protection detected on {source_name}")
+            await scheduler.pause_all_automations(f"{label} detected on {source_name}")
             
         try:
-            # Use solver to handle bot protection on the current page
-            solver = CaptchaSolver(self.browser_manager.config, self.anti_detection_manager)
-            success = await solver.solve_bot_protection(page)
+            solve = self.solver.solve_bot_protection if bot_protection else self.solver.solve_captcha
+            success = await asyncio.wait_for(solve(page), self.handling_timeout)
             
             if success:
-                logger.info("✅ Bot protection passed successfully!")
-                # RELOAD ALL TRIBALS PAGES to clear bot protection notifications
-                await self.reload_all_tribals_pages(exclude_page=page)
+                logger.info("✅ %s handled successfully!", label)
+                if bot_protection:
+                    # RELOAD ALL TRIBALS PAGES to clear bot protection notifications
+                    await self.reload_all_tribals_pages(exclude_page=page)
                 self.detected_captcha = False
                 
                 # RESUME ANTI-DETECTION AFTER SOLVING
@@ -235,58 +521,18 @@ class CaptchaDetector:
                 if scheduler:
                     await scheduler.resume_after_captcha()
             else:
-                logger.error("❌ Failed to pass bot protection - manual intervention required")
+                logger.error("❌ Failed to handle %s - manual intervention required", label.lower())
                 # Keep detected_captcha = True to prevent repeated attempts
                 # But still resume anti-detection
                 self.anti_detection_manager.resume()
                 
-        except Exception as e:
-            logger.error(f"❌ Error handling bot protection: {e}", exc_info=True)
+        except asyncio.TimeoutError:
+            logger.error("⏰ %s not handled within %ss, giving up", label, self.handling_timeout)
             self.detected_captcha = False  # Reset to allow retry
             self.anti_detection_manager.resume()  # Always resume
             
-    async def handle_captcha_detection(self, source_name: str, page: Page):
-        """Handle generic captcha detection (not bot protection)"""
-        if self.detected_captcha:
-            return  # Already handling
-            
-        self.detected_captcha = True
-        logger.error(f"🚨 CAPTCHA DETECTED on {source_name} page!")
-        
-        # SUSPEND ANTI-DETECTION BEFORE SOLVING
-        self.anti_detection_manager.suspend("captcha")
-        
-        # Import solver here to avoid circular imports
-        from .solver import CaptchaSolver
-        
-        # Pause all automations (don't stop them completely)
-        scheduler = getattr(self.browser_manager, 'scheduler', None)
-        if scheduler:
-            await scheduler.pause_all_automations(f"Captcha detected on {source_name}")
-            
-        try:
-            # Try to solve captcha
-            solver = CaptchaSolver(self.browser_manager.config, self.anti_detection_manager)
-            success = await solver.solve_captcha(page)
-            
-            if success:
-                logger.info("✅ Captcha solved successfully!")
-                self.detected_captcha = False
-                
-                # RESUME ANTI-DETECTION AFTER SOLVING
-                self.anti_detection_manager.resume()
-                
-                # Resume automations
-                if scheduler:
-                    await scheduler.resume_after_captcha()
-            else:
-                logger.error("❌ Failed to solve captcha - manual intervention required")
-                # Keep detected_captcha = True to prevent repeated attempts
-                # But still resume anti-detection
-                self.anti_detection_manager.resume()
-                
         except Exception as e:
-            logger.error(f"❌ Error handling captcha: {e}", exc_info=True)
+            logger.error("❌ Error handling %s: %s", label.lower(), e, exc_info=True)
             self.detected_captcha = False  # Reset to allow retry
             self.anti_detection_manager.resume()  # Always resume
 
@@ -297,23 +543,14 @@ class CaptchaDetector:
         try:
             # Get all pages from the browser context
             if self.browser_manager.main_context:
-                pages_to_reload = []
-                
-                # Collect all Tribals pages
-                for page in self.browser_manager.main_context.pages:
-                    try:
-                        if (not page.is_closed() and 
-                            'tribals.it' in page.url and 
-                            page != exclude_page):  # Don't reload the page we just solved on
-                            pages_to_reload.append(page)
-                    except:
-                        pass
+                # Collect all Tribals pages, except the one we just solved on
+                pages_to_reload = [page for page in self._tribals_pages() if page != exclude_page]
                 
                 # Reload each page
                 for page in pages_to_reload:
                     try:
                         current_url = page.url
-                        logger.debug(f"🔄 Reloading page: {current_url[:50]}...")
+                        logger.debug("🔄 Reloading page: %s...", current_url[:50])
                         
                         # Reload the page
                         await page.reload(wait_until='domcontentloaded', timeout=10000)
@@ -321,24 +558,24 @@ class CaptchaDetector:
                         # Re-apply stealth modifications after reload
                         try:
                             await self._reapply_stealth_to_page(page)
-                            logger.debug(f"✅ Re-applied stealth modifications after reload")
+                            logger.debug("✅ Re-applied stealth modifications after reload")
                         except Exception as stealth_error:
-                            logger.warning(f"⚠️ Could not re-apply stealth modifications: {stealth_error}")
+                            logger.warning("⚠️ Could not re-apply stealth modifications: %s", stealth_error)
                         
                         # Small delay between reloads
                         await asyncio.sleep(0.5)
                         
                     except Exception as e:
-                        logger.debug(f"Could not reload page: {e}")
+                        logger.debug("Could not reload page: %s", e)
                         continue
                 
-                logger.info(f"✅ Reloaded {len(pages_to_reload)} Tribals pages")
+                logger.info("✅ Reloaded %s Tribals pages", len(pages_to_reload))
                 
                 # Wait a bit for all pages to settle
                 await asyncio.sleep(2)
                 
         except Exception as e:
-            logger.error(f"Error reloading Tribals pages: {e}")
+            logger.error("Error reloading Tribals pages: %s", e)
             # Non-critical error, continue anyway
     
     async def _reapply_stealth_to_page(self, page: Page):
@@ -4,14 +4,69 @@ Captcha Solver - Fixed to handle login captcha with button workaround
 import asyncio
 import os
 import time
-from typing import Optional
+from typing import Dict, List, Optional
 from playwright.async_api import Page, Frame, Locator
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 
 from ..utils.logger import setup_logger
 from ..utils.screenshot_manager import screenshot_manager
 
 logger = setup_logger(__name__)
 
+# Bot protection still showing: start button, captcha in the row, or the quest
+BOT_PROTECTION_ACTIVE_JS = """
+() => !!document.querySelector(
+    'td.bot-protection-row a.btn.btn-default, td.bot-protection-row .captcha, #botprotection_quest'
+)
+"""
+
+# hCaptcha in the bot protection row, or any visible captcha element on the page
+CAPTCHA_PRESENT_JS = """
+(selectors) => {
+    if (document.querySelector('td.bot-protection-row .captcha .h-captcha')) return 'bot-protection';
+    
+    for (const element of document.querySelectorAll(selectors)) {
+        const rect = element.getBoundingClientRect();
+        if (rect.width > 0 && rect.height > 0 && getComputedStyle(element).visibility !== 'hidden') {
+            return selectors.split(', ').find(selector => element.matches(selector));
+        }
+    }
+    return null;
+}
+"""
+
+# Main page captcha elements checked by CAPTCHA_PRESENT_JS
+CAPTCHA_SELECTORS = ', '.join([
+    'iframe[src*="hcaptcha.com"][src*="challenge"]',
+    'div.h-captcha iframe',
+    '.h-captcha',
+    '[data-hcaptcha-widget-id]'
+])
+
+# Bot protection quest element, any of its known forms
+QUEST_SELECTORS = ', '.join([
+    '#botprotection_quest',
+    '.quest_new[onclick*="BotProtection"]',
+    '.quest-item[onclick*="BotProtection"]'
+])
+
+# hCaptcha container or iframe shown after starting the bot protection check
+HCAPTCHA_WIDGET_SELECTORS = ', '.join([
+    'td.bot-protection-row .captcha iframe[src*="hcaptcha.com"]',
+    '.captcha iframe[src*="hcaptcha.com"]',
+    'iframe[src*="hcaptcha.com"][data-hcaptcha-widget-id]',
+    'div[data-hcaptcha-widget-id]',
+    '.h-captcha iframe'
+])
+
+# hCaptcha iframe elements, for when the frame URL doesn't give it away
+HCAPTCHA_IFRAME_SELECTORS = ', '.join([
+    'iframe[src*="hcaptcha.com"]',
+    'iframe[data-hcaptcha-widget-id]',
+    '.h-captcha iframe',
+    'div[data-hcaptcha-widget-id] iframe'
+])
+
 # Try to import hcaptcha-challenger with correct imports
 try:
     from hcaptcha_challenger import AgentV, AgentConfig
@@ -38,6 +93,10 @@ class CaptchaSolver:
         self.gemini_api_key = os.getenv('GEMINI_API_KEY')
         self.force_manual = os.getenv('FORCE_MANUAL_CAPTCHA', 'false').lower() == 'true'
         self.anti_detection = anti_detection_manager
+        # id(page) -> that page's hCaptcha frames, kept current by frame events
+        self._hcaptcha_frames: Dict[int, List[Frame]] = {}
+        # AgentConfig per solving profile ('bot_protection' / 'login'), built on first use
+        self._agent_configs: Dict[str, 'AgentConfig'] = {}
         
         if HCAPTCHA_AVAILABLE and self.gemini_api_key:
             logger.info(f"✅ Gemini API key configured: {self.gemini_api_key[:10]}...")
@@ -49,11 +108,66 @@ class CaptchaSolver:
                 logger.error("   Set: export GEMINI_API_KEY=your_key_here")
                 logger.error("   Get key: https://aistudio.google.com/app/apikey")
                 
+    def _agent_config(self, profile: str) -> 'AgentConfig':
+        """AgentConfig for bot protection or login solving, reused across solves"""
+        agent_config = self._agent_configs.get(profile)
+        if agent_config is None:
+            if profile == 'login':
+                response_timeout = 180
+                render_ms = 2000  # Reduced since challenge appears fast
+            else:
+                response_timeout = self.config.get('captcha', {}).get('response_timeout', 180)
+                render_ms = 5000
+                
+            agent_config = AgentConfig(
+                GEMINI_API_KEY=self.gemini_api_key,
+                EXECUTION_TIMEOUT=response_timeout,
+                RESPONSE_TIMEOUT=response_timeout,
+                RETRY_ON_FAILURE=True,
+                WAIT_FOR_CHALLENGE_VIEW_TO_RENDER_MS=render_ms,
+                enable_challenger_debug=True,
+                screenshot_timeout=60000,
+                element_timeout=60000,
+                click_precision_padding=10,
+                verify_click_success=True,
+                max_click_attempts=3,
+                iframe_stability_delay=1000
+            )
+            self._agent_configs[profile] = agent_config
+        return agent_config
+        
+    def hcaptcha_frames(self, page: Page) -> List[Frame]:
+        """The page's hCaptcha frames, tracked from frame events instead of rescanning page.frames"""
+        page_id = id(page)
+        frames = self._hcaptcha_frames.get(page_id)
+        if frames is not None:
+            return frames
+            
+        frames = [frame for frame in page.frames if 'hcaptcha.com' in frame.url]
+        self._hcaptcha_frames[page_id] = frames
+        
+        def on_frame(frame):
+            if 'hcaptcha.com' in frame.url:
+                if frame not in frames:
+                    frames.append(frame)
+            elif frame in frames:
+                frames.remove(frame)
+                
+        def on_detached(frame):
+            if frame in frames:
+                frames.remove(frame)
+                
+        page.on('frameattached', on_frame)
+        page.on('framenavigated', on_frame)
+        page.on('framedetached', on_detached)
+        page.on('close', lambda _: self._hcaptcha_frames.pop(page_id, None))
+        return frames
+        
     async def monitor_captcha_frame(self, page: Page) -> Optional[Frame]:
         """Monitor and return the active captcha challenge frame"""
         # Look for the challenge frame
-        for frame in page.frames:
-            if 'hcaptcha.com' in frame.url and 'challenge' in frame.url:
+        for frame in self.hcaptcha_frames(page):
+            if 'challenge' in frame.url:
                 return frame
         return None
         
@@ -87,26 +201,11 @@ class CaptchaSolver:
         
         try:
             # Don't wait for network idle - it may never complete
-            # Just wait a bit for page to be ready
-            await asyncio.sleep(1)
+            # Just wait for the document to be ready
+            await page.wait_for_load_state('domcontentloaded')
             
             # Check if this is the quest div (clicking it starts captcha directly)
-            # Try multiple selectors for the quest element
-            quest_selectors = [
-                '#botprotection_quest',
-                'div#botprotection_quest',
-                '[id="botprotection_quest"]',
-                '.quest_new[onclick*="BotProtection"]',
-                '.quest-item[onclick*="BotProtection"]'
-            ]
-            
-            quest_element = None
-            for selector in quest_selectors:
-                quest_element = await page.query_selector(selector)
-                if quest_element:
-                    logger.info(f"Found quest element with selector: {selector}")
-                    break
-                    
+            quest_element = await page.query_selector(QUEST_SELECTORS)
             if quest_element:
                 logger.info("📋 Found bot protection quest - clicking to start captcha")
                 
@@ -139,7 +238,10 @@ class CaptchaSolver:
                     return await self._manual_solve_fallback(page)
                 
                 # Wait for captcha to appear
-                await asyncio.sleep(3)
+                try:
+                    await page.wait_for_selector('iframe[src*="hcaptcha.com"], .h-captcha', timeout=8000)
+                except Exception:
+                    logger.warning("⚠️ hCaptcha did not appear after quest click")
                 
                 # Capture after quest click
                 await screenshot_manager.capture_bot_protection(page, "after_quest_click")
@@ -162,38 +264,19 @@ class CaptchaSolver:
                 await start_button.click()
                 logger.info("✅ Clicked bot protection start button")
                 
-                # Wait for hCaptcha to load properly
+                # Wait for hCaptcha iframe to appear and load
                 logger.info("⏳ Waiting for hCaptcha to load...")
-                await asyncio.sleep(3)
-                
-                # Capture after button click
-                await screenshot_manager.capture_bot_protection(page, "after_button_click")
-                
-                # Wait for hCaptcha iframe to appear
                 try:
-                    # Look for the hcaptcha container or iframe
-                    hcaptcha_selectors = [
-                        'td.bot-protection-row .captcha iframe[src*="hcaptcha.com"]',
-                        '.captcha iframe[src*="hcaptcha.com"]',
-                        'iframe[src*="hcaptcha.com"][data-hcaptcha-widget-id]',
-                        'div[data-hcaptcha-widget-id]',
-                        '.h-captcha iframe'
-                    ]
-                    
-                    hcaptcha_found = False
-                    for selector in hcaptcha_selectors:
-                        element = await page.wait_for_selector(selector, timeout=5000)
-                        if element:
-                            logger.info(f"✅ Found hCaptcha via selector: {selector}")
-                            hcaptcha_found = True
-                            break
-                except:
+                    # Look for the hcaptcha container or iframe, any of them
+                    element = await page.wait_for_selector(HCAPTCHA_WIDGET_SELECTORS, timeout=8000)
+                    logger.info("✅ Found hCaptcha")
+                    frame = await element.content_frame()
+                    if frame:
+                        await frame.wait_for_load_state('load', timeout=5000)
+                except Exception:
                     logger.warning("⚠️ hCaptcha iframe not found with standard selectors")
                 
-                # Give it more time to fully load
-                await asyncio.sleep(2)
-                
-                # Capture hCaptcha loaded state
+                # Capture the state after the click, with hCaptcha loaded
                 await screenshot_manager.capture_bot_protection(page, "hcaptcha_loaded")
                 
                 # Check if it's multi-challenge and force manual if configured
@@ -234,24 +317,8 @@ class CaptchaSolver:
                 # Capture attempt state
                 await screenshot_manager.capture_captcha(page, f"attempt_{attempt + 1}")
                 
-                # Initialize AgentV with configuration
-                agent_config = AgentConfig(
-                    GEMINI_API_KEY=self.gemini_api_key,
-                    EXECUTION_TIMEOUT=self.config.get('captcha', {}).get('response_timeout', 180),
-                    RESPONSE_TIMEOUT=self.config.get('captcha', {}).get('response_timeout', 180),
-                    RETRY_ON_FAILURE=True,
-                    WAIT_FOR_CHALLENGE_VIEW_TO_RENDER_MS=5000,
-                    enable_challenger_debug=True,
-                    screenshot_timeout=60000,
-                    element_timeout=60000,
-                    click_precision_padding=10,
-                    verify_click_success=True,
-                    max_click_attempts=3,
-                    iframe_stability_delay=1000
-                )
-                
-                # Create agent instance
-                agent = AgentV(page=page, agent_config=agent_config)
+                # Create a fresh agent so no challenge state carries over from a failed attempt
+                agent = AgentV(page=page, agent_config=self._agent_config('bot_protection'))
                 
                 # Capture before checkbox click
                 await screenshot_manager.capture_captcha(page, "before_checkbox")
@@ -275,8 +342,11 @@ class CaptchaSolver:
                 # Capture after checkbox click
                 await screenshot_manager.capture_captcha(page, "after_checkbox")
                 
-                # Wait a bit after clicking checkbox
-                await asyncio.sleep(3)
+                # Wait for the challenge to open after clicking checkbox
+                try:
+                    await page.wait_for_selector('iframe[src*="hcaptcha.com"][src*="challenge"]', timeout=5000)
+                except Exception:
+                    logger.debug("No challenge shown after checkbox click")
                 
                 # Check if it's multi-challenge after checkbox click
                 if await self.is_multi_challenge(page):
@@ -309,8 +379,14 @@ class CaptchaSolver:
                     except:
                         pass  # Ignore screenshot errors if page is closed
                     
-                # Wait for result to process
-                await asyncio.sleep(3)
+                # Wait for result to process (bot protection gone or page reloaded)
+                try:
+                    await page.wait_for_function(
+                        "() => !document.querySelector('td.bot-protection-row, #botprotection_quest:not(.completed)')",
+                        timeout=3000
+                    )
+                except Exception:
+                    pass  # Still present, or navigated away; checked below
                 
                 # Capture final state
                 await screenshot_manager.capture_captcha(page, f"attempt_{attempt + 1}_result")
@@ -379,52 +455,36 @@ class CaptchaSolver:
             # Check if captcha is already active (from previous attempt)
             captcha_already_active = await self._is_captcha_challenge_present(page)
             
+            async def click_login_as_checkbox():
+                """Click login button instead of checkbox"""
+                # Only click if captcha not already active
+                if not captcha_already_active:
+                    logger.info("🎯 Clicking login button (as checkbox workaround)...")
+                    login_btn = await page.query_selector('a.btn-login')
+                    if login_btn:
+                        await login_btn.click()
+                        logger.info("✅ Clicked login button via workaround")
+                        # Wait for challenge to appear
+                        try:
+                            await page.wait_for_selector(
+                                'iframe[src*="hcaptcha.com"][src*="challenge"]', timeout=5000
+                            )
+                        except Exception:
+                            logger.debug("Challenge not visible yet after login click")
+                    else:
+                        logger.error("❌ Login button not found for workaround")
+                        raise Exception("Login button not found")
+                else:
+                    logger.info("🎯 Captcha already active, skipping login button click")
+            
             for attempt in range(self.max_retries):
                 try:
                     logger.info(f"🔄 Captcha solve attempt {attempt + 1}/{self.max_retries}")
                     
-                    # Initialize AgentV with configuration
-                    agent_config = AgentConfig(
-                        GEMINI_API_KEY=self.gemini_api_key,
-                        EXECUTION_TIMEOUT=180,
-                        RESPONSE_TIMEOUT=180,
-                        RETRY_ON_FAILURE=True,
-                        WAIT_FOR_CHALLENGE_VIEW_TO_RENDER_MS=2000,  # Reduced since challenge appears fast
-                        enable_challenger_debug=True,
-                        screenshot_timeout=60000,
-                        element_timeout=60000,
-                        click_precision_padding=10,
-                        verify_click_success=True,
-                        max_click_attempts=3,
-                        iframe_stability_delay=1000
-                    )
-                    
-                    # Create agent instance
-                    agent = AgentV(page=page, agent_config=agent_config)
+                    # Create a fresh agent so no challenge state carries over from a failed attempt
+                    agent = AgentV(page=page, agent_config=self._agent_config('login'))
                     
                     # WORKAROUND: Override the checkbox click to click login button instead
-                    original_click_checkbox = agent.robotic_arm.click_checkbox
-                    
-                    async def click_login_as_checkbox():
-                        """Click login button instead of checkbox"""
-                        # Only click if captcha not already active
-                        if not captcha_already_active:
-                            logger.info("🎯 Clicking login button (as checkbox workaround)...")
-                            login_btn = await page.query_selector('a.btn-login')
-                            if login_btn:
-                                await login_btn.click()
-                                logger.info("✅ Clicked login button via workaround")
-                                # Wait for challenge to appear
-                                await asyncio.sleep(2)
-                            else:
-                                logger.error("❌ Login button not found for workaround")
-                                raise Exception("Login button not found")
-                        else:
-                            logger.info("🎯 Captcha already active, skipping login button click")
-                            # Just wait a bit
-                            await asyncio.sleep(1)
-                    
-                    # Replace the checkbox click method
                     agent.robotic_arm.click_checkbox = click_login_as_checkbox
                     
                     try:
@@ -469,10 +529,6 @@ class CaptchaSolver:
                 except Exception as e:
                     logger.error(f"❌ Attempt {attempt + 1} failed: {e}", exc_info=True)
                     
-                # Restore original method for next attempt
-                if 'original_click_checkbox' in locals():
-                    agent.robotic_arm.click_checkbox = original_click_checkbox
-                    
                 # Update captcha state for next attempt
                 captcha_already_active = await self._is_captcha_challenge_present(page)
                 
@@ -492,35 +548,24 @@ class CaptchaSolver:
                 
     async def _find_hcaptcha_iframe(self, page: Page) -> Optional[Frame]:
         """Find the hCaptcha iframe on the page"""
-        # Check all frames
-        for frame in page.frames:
-            if 'hcaptcha.com' in frame.url:
-                logger.debug(f"Found hCaptcha frame: {frame.url}")
-                return frame
+        # Check all hCaptcha frames
+        for frame in self.hcaptcha_frames(page):
+            logger.debug(f"Found hCaptcha frame: {frame.url}")
+            return frame
                 
         # Also check for iframe elements
-        iframe_selectors = [
-            'iframe[src*="hcaptcha.com"]',
-            'iframe[data-hcaptcha-widget-id]',
-            '.h-captcha iframe',
-            'div[data-hcaptcha-widget-id] iframe'
-        ]
-        
-        for selector in iframe_selectors:
-            iframe = await page.query_selector(selector)
-            if iframe:
-                logger.debug(f"Found hCaptcha iframe via selector: {selector}")
-                # Get the frame from the iframe element
-                frame_element = await iframe.content_frame()
-                if frame_element:
-                    return frame_element
-                    
+        iframe = await page.query_selector(HCAPTCHA_IFRAME_SELECTORS)
+        if iframe:
+            logger.debug("Found hCaptcha iframe via selector")
+            # Get the frame from the iframe element
+            return await iframe.content_frame()
+            
         return None
         
     async def _find_hcaptcha_frame(self, page: Page) -> Optional[Frame]:
         """Find the hCaptcha frame (not challenge frame)"""
-        for frame in page.frames:
-            if 'hcaptcha.com' in frame.url and 'hcaptcha.html' in frame.url:
+        for frame in self.hcaptcha_frames(page):
+            if 'hcaptcha.html' in frame.url:
                 return frame
         return None
         
@@ -545,19 +590,23 @@ class CaptchaSolver:
             
         # Wait for login to complete
         max_wait = self.timeout
-        check_interval = 2
+        reminder_interval = 15
         elapsed = 0
         
         while elapsed < max_wait:
-            # Check if we're logged in (reached game.php)
-            if "game.php" in page.url:
+            wait = min(reminder_interval, max_wait - elapsed)
+            try:
+                # Wake up as soon as we're logged in (reached game.php)
+                await page.wait_for_url(lambda url: "game.php" in url, timeout=wait * 1000, wait_until='commit')
                 logger.info("✅ Manual login successful!")
                 return True
+            except PlaywrightTimeoutError:
+                elapsed += wait
+            except Exception as e:
+                logger.error(f"❌ Error waiting for manual login: {e}")
+                return False
                 
-            await asyncio.sleep(check_interval)
-            elapsed += check_interval
-            
-            if elapsed % 15 == 0:  # Remind every 15 seconds
+            if elapsed < max_wait:  # Remind every 15 seconds
                 remaining = max_wait - elapsed
                 logger.warning(f"⏰ Waiting for manual login... ({remaining}s remaining)")
                 
@@ -572,49 +621,24 @@ class CaptchaSolver:
                 logger.debug("In game with screen - bot protection passed")
                 return False
                 
-            # Check if bot protection elements are present
-            bot_protection = await page.query_selector('td.bot-protection-row')
-            if bot_protection:
-                # Check if it's the initial page with button or active captcha
-                start_button = await page.query_selector('td.bot-protection-row a.btn.btn-default')
-                captcha_div = await page.query_selector('td.bot-protection-row .captcha')
-                
-                if start_button or captcha_div:
-                    return True
-                    
-            # Check for the quest notification
-            quest = await page.query_selector('#botprotection_quest')
-            if quest:
-                return True
-                
-            return False
+            # Check for the initial page with button, an active captcha or the quest
+            return await page.evaluate(BOT_PROTECTION_ACTIVE_JS)
         except:
             return False
             
     async def _is_captcha_challenge_present(self, page: Page) -> bool:
         """Check if captcha challenge is present on page"""
         try:
-            # Check for bot protection elements
-            bot_protection = await page.query_selector('td.bot-protection-row')
-            if bot_protection:
-                # Check if there's a captcha in the bot protection
-                captcha_div = await page.query_selector('td.bot-protection-row .captcha')
-                if captcha_div:
-                    # Check if it has hCaptcha
-                    hcaptcha = await captcha_div.query_selector('.h-captcha')
-                    if hcaptcha:
-                        logger.debug("Found hCaptcha in bot protection")
-                        return True
-                        
+            # Check the bot protection row and main page captcha elements at once
+            found = await page.evaluate(CAPTCHA_PRESENT_JS, CAPTCHA_SELECTORS)
+            if found:
+                logger.debug(f"Found visible captcha element: {found}")
+                return True
+                
             # Look for hCaptcha challenge frame
-            challenge_frame = None
-            for frame in page.frames:
-                if 'hcaptcha.com' in frame.url and 'challenge' in frame.url:
-                    logger.debug(f"Found hCaptcha challenge frame: {frame.url}")
-                    challenge_frame = frame
-                    break
-                    
+            challenge_frame = await self.monitor_captcha_frame(page)
             if challenge_frame:
+                logger.debug(f"Found hCaptcha challenge frame: {challenge_frame.url}")
                 try:
                     challenge_view = await challenge_frame.query_selector('.challenge-view')
                     if challenge_view:
@@ -623,25 +647,6 @@ class CaptchaSolver:
                 except:
                     pass
                     
-            # Check main page for captcha elements
-            captcha_selectors = [
-                'iframe[src*="hcaptcha.com"][src*="challenge"]',
-                'div.h-captcha iframe',
-                '.h-captcha',
-                '[data-hcaptcha-widget-id]'
-            ]
-            
-            for selector in captcha_selectors:
-                element = await page.query_selector(selector)
-                if element:
-                    try:
-                        is_visible = await element.is_visible()
-                        if is_visible:
-                            logger.debug(f"Found visible captcha element: {selector}")
-                            return True
-                    except:
-                        pass
-                        
             # Check if we've successfully passed
             if "game.php" in page.url:
                 logger.debug("On game page - no captcha")
@@ -707,24 +712,47 @@ class CaptchaSolver:
         except:
             pass
             
-        # Wait for user to solve
+        # Wait for user to solve; a main frame navigation (the page reloading once
+        # the check passes) triggers an immediate re-check
         max_wait = self.timeout
         check_interval = 3
         elapsed = 0
         
-        while elapsed < max_wait:
-            # Check if captcha/bot protection is gone
-            if not await self._is_captcha_challenge_present(page) and not await self._is_bot_protection_active(page):
-                logger.info("✅ Captcha/bot protection solved manually!")
-                await screenshot_manager.capture_captcha(page, "manual_solve_success")
-                return True
+        navigated = asyncio.Event()
+        
+        def on_navigated(frame):
+            if frame == page.main_frame:
+                navigated.set()
+                
+        page.on('framenavigated', on_navigated)
+        try:
+            start = time.monotonic()
+            next_reminder = 15
+            while elapsed < max_wait:
+                navigated.clear()
+                
+                # Check if captcha/bot protection is gone, both at once
+                captcha_present, bot_protection_active = await asyncio.gather(
+                    self._is_captcha_challenge_present(page),
+                    self._is_bot_protection_active(page)
+                )
+                if not captcha_present and not bot_protection_active:
+                    logger.info("✅ Captcha/bot protection solved manually!")
+                    await screenshot_manager.capture_captcha(page, "manual_solve_success")
+                    return True
                     
-            await asyncio.sleep(check_interval)
-            elapsed += check_interval
-            
-            if elapsed % 15 == 0:  # Remind every 15 seconds
-                remaining = max_wait - elapsed
-                logger.warning(f"⏰ Waiting for manual solve... ({remaining}s remaining)")
+                try:
+                    await asyncio.wait_for(navigated.wait(), check_interval)
+                except asyncio.TimeoutError:
+                    pass
+                elapsed = int(time.monotonic() - start)
+                
+                if elapsed >= next_reminder:  # Remind every 15 seconds
+                    next_reminder += 15
+                    remaining = max(0, max_wait - elapsed)
+                    logger.warning(f"⏰ Waiting for manual solve... ({remaining}s remaining)")
+        finally:
+            page.remove_listener('framenavigated', on_navigated)
                 
         logger.error("❌ Captcha solve timeout")
         await screenshot_manager.capture_captcha(page, "manual_solve_timeout")
@@ -6,15 +6,21 @@ import random
 import os
 from abc import ABC, abstractmethod
 from typing import Dict, Any, Optional
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from playwright.async_api import Page
 
+from ..utils.helpers import TB_NAMESPACE_JS
 from ..utils.logger import setup_logger
 from ..utils.screenshot_manager import screenshot_manager
 
 logger = setup_logger(__name__)
 
+# Consecutive run-loop timeouts retried right away before backing off, and
+# the cap (seconds) of the doubling backoff used after that
+MAX_QUICK_RETRIES = 3
+MAX_BACKOFF = 10
+
 
 class BaseAutomation(ABC):
     """Base class for all automation scripts with human-like behavior"""
@@ -24,9 +30,21 @@ class BaseAutomation(ABC):
         self.browser_manager = browser_manager
         self.script_config = config['scripts'][self.name]
         self.running = False
-        self.paused = False
+        # Set while running, cleared while paused
+        self._pause_event = asyncio.Event()
+        self._pause_event.set()
+        # Set by stop() to cut short long waits (e.g. outside active hours)
+        self._stop_event = asyncio.Event()
         self.page: Optional[Page] = None
         self.attempts = 0
+        # Subclasses that run at full speed set this to False
+        self.use_human_behavior = True
+        # Current backoff (seconds) for connection-level errors in run loops, and
+        # timeouts retried right away since the last clean iteration
+        self._backoff = 1
+        self._quick_retries = 0
+        # Page that already has this automation's helpers installed
+        self._helpers_page: Optional[Page] = None
         
         # Monitoring metrics
         self.run_count = 0
@@ -63,6 +81,26 @@ class BaseAutomation(ABC):
         """URL pattern for this script"""
         pass
         
+    @property
+    def paused(self) -> bool:
+        """Whether the automation is currently paused"""
+        return not self._pause_event.is_set()
+        
+    @paused.setter
+    def paused(self, value: bool):
+        if value:
+            self._pause_event.clear()
+        else:
+            self._pause_event.set()
+            
+    def pause(self):
+        """Pause the automation loop"""
+        self._pause_event.clear()
+        
+    def resume(self):
+        """Resume the automation loop"""
+        self._pause_event.set()
+        
     @abstractmethod
     async def run_automation(self):
         """Main automation logic - must be implemented by subclasses"""
@@ -76,6 +114,7 @@ class BaseAutomation(ABC):
             
         logger.info(f"🟢 Starting {self.name}")
         self.running = True
+        self._stop_event.clear()
         self.attempts = 0
         self.start_time = datetime.now()
         
@@ -88,7 +127,8 @@ class BaseAutomation(ABC):
             
             # Add initial human-like delay (only if not suspended)
             if not self.anti_detection.is_suspended():
-                await self.human_delay(2000, 5000)
+                if self.use_human_behavior:
+                    await self.human_delay(2000, 5000)
                 
                 # Initial random mouse movement
                 await self.human.random_mouse_movement(self.page, 1.5)
@@ -128,6 +168,9 @@ class BaseAutomation(ABC):
             
         logger.info(f"🔴 Stopping {self.name}")
         self.running = False
+        # Wake a loop blocked on pause or sleep so it can see running=False
+        self._pause_event.set()
+        self._stop_event.set()
         
         # Close page
         await self.browser_manager.close_page(self.name)
@@ -146,6 +189,61 @@ class BaseAutomation(ABC):
             # Crosses midnight
             return current_hour >= start_hour or current_hour < end_hour
             
+    def seconds_until_active(self) -> float:
+        """Seconds until active hours next start (0 when already active)"""
+        if self.is_within_active_hours():
+            return 0.0
+            
+        now = datetime.now()
+        next_start = now.replace(
+            hour=self.config['active_hours']['start'], minute=0, second=0, microsecond=0
+        )
+        if next_start <= now:
+            next_start += timedelta(days=1)
+        return (next_start - now).total_seconds()
+        
+    async def sleep_until_active(self):
+        """Sleep until active hours start, returning early if stopped"""
+        try:
+            await asyncio.wait_for(self._stop_event.wait(), self.seconds_until_active())
+        except asyncio.TimeoutError:
+            pass
+            
+    async def retry_after_timeout(self, error: Exception, where: str):
+        """Retry a timed-out run-loop step right away a few times, then back off"""
+        self._quick_retries += 1
+        if self._quick_retries <= MAX_QUICK_RETRIES:
+            logger.debug(f"Timeout in {where} ({self._quick_retries}/{MAX_QUICK_RETRIES}), retrying: {error}")
+            await asyncio.sleep(0.1)
+            return
+            
+        self._backoff = min(self._backoff * 2, MAX_BACKOFF)
+        logger.warning(f"⚠️ Repeated timeouts in {where}: {error}, retrying in {self._backoff}s")
+        await asyncio.sleep(self._backoff)
+        
+    async def _backoff_after_error(self, error: Exception, where: str):
+        """Wait out a connection-level run-loop error, doubling the wait each time"""
+        self._backoff = min(self._backoff * 2, MAX_BACKOFF)
+        logger.warning(f"⚠️ Connection error in {where}: {error}, retrying in {self._backoff}s")
+        await asyncio.sleep(self._backoff)
+        
+    def _reset_backoff(self):
+        """Forget backoff and quick-retry state after a clean (or fully failed) iteration"""
+        self._backoff = 1
+        self._quick_retries = 0
+        
+    async def install_helpers(self, script: str):
+        """Install page-side helpers once per page, top document only, with `tb` bound to window.__tb"""
+        if self._helpers_page is self.page:
+            return
+            
+        source = f"(() => {{\n    if (window.top !== window) return;\n    {TB_NAMESPACE_JS}\n{script}\n}})();"
+        # Init script covers future navigations, evaluate covers the current document
+        await self.page.add_init_script(source)
+        await self.page.evaluate(source)
+        self._helpers_page = self.page
+        logger.debug(f"✅ Installed {self.name} helpers")
+        
     def build_url(self) -> str:
         """Build URL for this script"""
         base_url = self.config['server']['base_url']
@@ -1212,6 +1212,9 @@ class StealthBrowserManager:
             # Inject stealth scripts
             await self._inject_ultra_stealth_scripts(self.main_context)
             
+            # Push captcha notifications from every page
+            await self.captcha_detector.install_watchers(self.main_context)
+            
             # Set up request interception
             await self.main_context.route('**/*', self._handle_request)
             
@@ -1611,10 +1614,7 @@ class StealthBrowserManager:
         if await self.captcha_detector.check_for_bot_protection(self.game_page):
             logger.warning("🚨 Bot protection detected!")
             
-            from ..captcha.solver import CaptchaSolver
-            solver = CaptchaSolver(self.config, self.anti_detection_manager)
-            
-            success = await solver.solve_bot_protection(self.game_page)
+            success = await self.captcha_detector.solver.solve_bot_protection(self.game_page)
             if not success:
                 raise Exception("Bot protection not resolved")
                 
@@ -1622,10 +1622,7 @@ class StealthBrowserManager:
         elif await self.captcha_detector.check_page_for_captcha(self.game_page):
             logger.warning("🚨 Captcha detected!")
             
-            from ..captcha.solver import CaptchaSolver
-            solver = CaptchaSolver(self.config, self.anti_detection_manager)
-            
-            success = await solver.solve_captcha(self.game_page)
+            success = await self.captcha_detector.solver.solve_captcha(self.game_page)
             if not success:
                 raise Exception("Captcha not resolved")
         else:
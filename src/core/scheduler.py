@@ -214,7 +214,7 @@ class Scheduler:
             
             # Resume all paused automations
             for name, automation in self.automations.items():
-                if automation.running and hasattr(automation, 'paused'):
+                if automation.running and automation.paused:
                     automation.paused = False
                     logger.info(f"▶️ Resumed {name}")
                     
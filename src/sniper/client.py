@@ -98,6 +98,39 @@ class SniperClient:
             logger.error(f"Failed to update session: {e}")
             return False
             
+    def _to_local_time(self, execute_at: datetime) -> datetime:
+        """Convert to local time if needed - Rust expects local time with timezone info"""
+        if execute_at.tzinfo is not None:
+            # Convert to local timezone
+            return execute_at.astimezone()
+            
+        # Add local timezone info if missing
+        import time
+        from datetime import timezone as tz
+        # Get local timezone offset
+        local_offset = -time.timezone if not time.daylight else -time.altzone
+        local_tz = tz(timedelta(seconds=local_offset))
+        return execute_at.replace(tzinfo=local_tz)
+        
+    def _attack_request(
+        self,
+        target_village_id: int,
+        source_village_id: int,
+        attack_type: str,
+        units: Dict[str, int],
+        execute_at: datetime,
+        priority: int = 100
+    ) -> Dict[str, Any]:
+        """Build the JSON body for one attack"""
+        return {
+            "target_village_id": target_village_id,
+            "source_village_id": source_village_id,
+            "attack_type": attack_type.lower(),
+            "units": units,
+            "execute_at": self._to_local_time(execute_at).isoformat(),
+            "priority": priority
+        }
+        
     async def schedule_attack(
         self,
         target_village_id: int,
@@ -121,33 +154,16 @@ class SniperClient:
         Returns:
             Attack ID if successful, None if failed
         """
-        # Convert to local time if needed - Rust expects local time with timezone info
-        if execute_at.tzinfo is not None:
-            # Convert to local timezone
-            local_execute_at = execute_at.astimezone()
-        else:
-            # Add local timezone info if missing
-            import time
-            from datetime import timezone as tz
-            # Get local timezone offset
-            local_offset = -time.timezone if not time.daylight else -time.altzone
-            local_tz = tz(timedelta(seconds=local_offset))
-            local_execute_at = execute_at.replace(tzinfo=local_tz)
-            
-        request_data = {
-            "target_village_id": target_village_id,
-            "source_village_id": source_village_id,
-            "attack_type": attack_type.lower(),
-            "units": units,
-            "execute_at": local_execute_at.isoformat(),
-            "priority": priority
-        }
+        request_data = self._attack_request(
+            target_village_id, source_village_id, attack_type, units, execute_at, priority
+        )
         
         try:
             response = await self._request("POST", "/attack/schedule", json=request_data)
             attack_id = response.get("attack_id")
             
-            # Log using local time
+            # Log using the local time that was sent
+            local_execute_at = datetime.fromisoformat(request_data["execute_at"])
             logger.info(f"🎯 Scheduled {attack_type} attack {attack_id}: {source_village_id} -> {target_village_id} at {local_execute_at.strftime('%Y-%m-%d %H:%M:%S')} local time")
             return attack_id
             
@@ -155,6 +171,42 @@ class SniperClient:
             logger.error(f"Failed to schedule attack: {e}")
             return None
             
+    async def schedule_attacks_batch(self, attacks: List[Dict[str, Any]]) -> List[Optional[str]]:
+        """
+        Schedule several attacks in a single request
+        
+        Args:
+            attacks: Dicts with the same keys as schedule_attack's arguments
+            
+        Returns:
+            Attack ID for each attack in order, None where it was rejected or failed
+        """
+        if not attacks:
+            return []
+            
+        request_data = [self._attack_request(**attack) for attack in attacks]
+        
+        try:
+            response = await self._request("POST", "/attack/schedule_batch", json=request_data)
+        except aiohttp.ClientResponseError as e:
+            if e.status in (404, 405):
+                # Service binary predates the batch endpoint
+                logger.warning("⚠️ Sniper service has no batch endpoint, scheduling one by one")
+                return [await self.schedule_attack(**attack) for attack in attacks]
+            logger.error(f"Failed to schedule attack batch: {e}")
+            return [None] * len(attacks)
+        except Exception as e:
+            logger.error(f"Failed to schedule attack batch: {e}")
+            return [None] * len(attacks)
+            
+        if not isinstance(response, list) or len(response) != len(attacks):
+            logger.error(f"Unexpected batch schedule response: {response}")
+            return [None] * len(attacks)
+            
+        attack_ids = [result.get("attack_id") for result in response]
+        logger.info(f"🎯 Scheduled {sum(1 for a in attack_ids if a)} of {len(attacks)} attacks in one batch")
+        return attack_ids
+        
     async def get_attack_status(self, attack_id: str) -> Optional[Dict[str, Any]]:
         """Get status of a specific attack"""
         try:
@@ -430,6 +430,14 @@ class SniperManager:
             priority=priority
         )
         
+    async def schedule_attacks_batch(self, attacks: List[Dict[str, Any]]) -> List[Optional[str]]:
+        """Convenience method to schedule several attacks in one request"""
+        if not self.client:
+            logger.error("Sniper service not initialized")
+            return [None] * len(attacks)
+            
+        return await self.client.schedule_attacks_batch(attacks)
+        
     async def get_service_status(self) -> Dict[str, Any]:
         """Get comprehensive service status"""
         if not self.client:
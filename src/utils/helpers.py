@@ -154,6 +154,11 @@ class AsyncRetry:
         return wrapper
 
 
+# Binds `tb` to the shared, non-enumerable window.__tb namespace that every
+# injected script keeps its page-side state and helpers under
+TB_NAMESPACE_JS = "const tb = window.__tb || Object.defineProperty(window, '__tb', { value: {} }).__tb;"
+
+
 # Resource type helpers
 RESOURCE_TYPES = ['wood', 'stone', 'iron']
 
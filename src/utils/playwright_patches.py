@@ -0,0 +1,49 @@
+"""
+Playwright Patches - Cut per-call overhead inside playwright-python
+"""
+import inspect
+import os
+import sys
+from typing import List
+
+
+class _ContextFreeInspect:
+    """inspect stand-in whose stack() only walks the frame chain"""
+
+    def __getattr__(self, name):
+        return getattr(inspect, name)
+
+    @staticmethod
+    def stack(context: int = 0) -> List[inspect.FrameInfo]:
+        records = []
+        frame = sys._getframe(1)  # Skip this frame so the caller comes first
+        while frame is not None:
+            code = frame.f_code
+            # Playwright reads the frame itself (f_locals, f_code) from index 0
+            records.append(inspect.FrameInfo(frame, code.co_filename, frame.f_lineno,
+                                             code.co_name, None, None))
+            frame = frame.f_back
+        return records
+
+
+def apply_playwright_patches() -> bool:
+    """Make Playwright's per-call stack capture cheap; set PW_INSPECT_STACK=1 to keep it as is
+
+    Every API call records the caller's stack with inspect.stack(), which builds
+    a full FrameInfo per frame (source file lookup and source lines included).
+    Playwright only uses the frame object, file and line of each record, so the
+    records are built straight off the frame chain instead.
+    """
+    if os.environ.get('PW_INSPECT_STACK') == '1':
+        return False
+
+    try:
+        from playwright._impl import _connection
+    except ImportError:
+        return False
+
+    if getattr(_connection, 'inspect', None) is not inspect:
+        return False  # Different Playwright internals, leave them alone
+
+    _connection.inspect = _ContextFreeInspect()
+    return True